@@ -0,0 +1,67 @@
+"""AI turns played on a background thread.
+
+The GUI used to run an AI player's phases inline on its event loop, so the
+window froze for the whole search.  An AITurn plays the turn on a deep copy
+of the game in a worker thread instead.  Every action the copy records (see
+RiskGame._record) is put on a queue, and the GUI applies them to the real
+game with RiskGame.apply_action one at a time, at its own pace, while it
+keeps handling input and drawing.
+"""
+import copy
+import queue
+import threading
+from typing import Optional, Tuple
+
+DONE = 'done'  # Queued after the fortify phase
+FAILED = 'failed'  # Queued with the exception when the search raised
+
+
+class AITurn:
+    """
+    The current player's reinforce, attack and fortify phases, searched on a
+    copy of `game`. The turn itself (start_turn, end_turn) stays with the
+    caller, which must not change the game until finish().
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.player = game.current_player
+        self.copy = None
+        self.actions = queue.Queue()
+        self.thread = threading.Thread(target=self._play, name=f"AI turn: {self.player.name}", daemon=True)
+        self.thread.start()
+
+    def _play(self):
+        try:
+            # Copying a board takes tens of milliseconds, so that too happens off the GUI thread.
+            # Copies of a game drop its listeners, so the copy only ever reports to this queue
+            game = self.copy = copy.deepcopy(self.game)
+            game.action_listeners.append(lambda action, args: self.actions.put((action, args)))
+            player = game.current_player
+            player._reinforcement_phase(game)
+            game.set_phase('attack')
+            player._attack_phase(game)
+            game.set_phase('fortify')
+            player._fortify_phase(game)
+        except Exception as e:
+            self.actions.put((FAILED, (e,)))
+        else:
+            self.actions.put((DONE, ()))
+
+    def next_action(self) -> Optional[Tuple[str, tuple]]:
+        """The next (action, args) if the worker has queued one, without waiting"""
+        try:
+            return self.actions.get_nowait()
+        except queue.Empty:
+            return None
+
+    def finish(self):
+        """Hand the random streams and search state the copy built up back to the real game"""
+        self.thread.join()
+        if self.copy is None:
+            return
+        # apply_action replays the copy's dice without rolling, so the real stream moves on here
+        self.game.rng.setstate(self.copy.rng.getstate())
+        searched = self.copy.current_player
+        self.player.rng.setstate(searched.rng.getstate())
+        self.player.search_stats = searched.search_stats
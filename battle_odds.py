@@ -0,0 +1,174 @@
+"""Exact battle odds from the dice Markov chain.
+
+A battle repeats RiskGame.resolve_combat rounds until the defender has no
+troops left or the attacker is down to one troop, so its outcome depends only
+on (attacker troops, defender troops).  The tables below are computed once
+per process and extended lazily as bigger armies show up.
+"""
+from itertools import product
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+
+def _roll_outcomes(attacker_dice: int, defender_dice: int) -> Tuple[Tuple[int, int, float], ...]:
+    """(attacker losses, defender losses, probability) for one round of dice"""
+    counts = {}
+    total = 0
+    for rolls in product(range(1, 7), repeat=attacker_dice + defender_dice):
+        attacker_rolls = sorted(rolls[:attacker_dice], reverse=True)
+        defender_rolls = sorted(rolls[attacker_dice:], reverse=True)
+        attacker_losses = 0
+        defender_losses = 0
+        for a_roll, d_roll in zip(attacker_rolls, defender_rolls):
+            if a_roll > d_roll:
+                defender_losses += 1
+            else:
+                attacker_losses += 1  # Ties go to the defender
+        counts[(attacker_losses, defender_losses)] = counts.get((attacker_losses, defender_losses), 0) + 1
+        total += 1
+    return tuple((a, d, n / total) for (a, d), n in sorted(counts.items()))
+
+
+# ROLL_OUTCOMES[(attacker dice, defender dice)]; a defender with no troops left has no dice
+ROLL_OUTCOMES = {
+    (attacker_dice, defender_dice): _roll_outcomes(attacker_dice, defender_dice)
+    for attacker_dice in (1, 2, 3) for defender_dice in (0, 1, 2)
+}
+
+
+def roll_outcomes(attacker_troops: int, defender_troops: int) -> Tuple[Tuple[int, int, float], ...]:
+    """Outcomes of a single attack with the dice counts RiskGame.resolve_combat would use"""
+    return ROLL_OUTCOMES[(min(3, attacker_troops - 1), min(2, defender_troops))]
+
+
+class BattleOutcome:
+    """Result distribution of a full battle between `attacker` and `defender` troops"""
+
+    __slots__ = ('attacker', 'defender', 'win_probability', 'attacker_survivors',
+                 'defender_survivors', 'expected_attacker_survivors', 'expected_defender_survivors')
+
+    def __init__(self, attacker: int, defender: int, attacker_survivors: list, defender_survivors: list):
+        self.attacker = attacker
+        self.defender = defender
+        # attacker_survivors[k]: P(attacker wins with k troops left in the attacking territory)
+        self.attacker_survivors = tuple(attacker_survivors)
+        # defender_survivors[k]: P(attacker gives up at 1 troop with k defenders left)
+        self.defender_survivors = tuple(defender_survivors)
+        self.win_probability = sum(self.attacker_survivors)
+        self.expected_attacker_survivors = (
+            sum(k * p for k, p in enumerate(self.attacker_survivors)) + (1 - self.win_probability)
+        )
+        self.expected_defender_survivors = sum(k * p for k, p in enumerate(self.defender_survivors))
+
+
+_outcomes: Dict[Tuple[int, int], BattleOutcome] = {}
+_extent = [0, -1]  # attacker and defender troops covered so far
+
+
+def _compute(attacker: int, defender: int) -> BattleOutcome:
+    attacker_survivors = [0.0] * (attacker + 1)
+    defender_survivors = [0.0] * (defender + 1)
+    if defender <= 0:
+        attacker_survivors[attacker] = 1.0
+    elif attacker <= 1:
+        defender_survivors[defender] = 1.0
+    else:
+        for attacker_losses, defender_losses, p in roll_outcomes(attacker, defender):
+            child = _outcomes[(attacker - attacker_losses, defender - defender_losses)]
+            for k, q in enumerate(child.attacker_survivors):
+                attacker_survivors[k] += p * q
+            for k, q in enumerate(child.defender_survivors):
+                defender_survivors[k] += p * q
+    return BattleOutcome(attacker, defender, attacker_survivors, defender_survivors)
+
+
+def _extend(attacker: int, defender: int):
+    max_attacker = max(attacker, _extent[0])
+    max_defender = max(defender, _extent[1])
+    # Every round removes at least one troop, so each entry only needs entries
+    # with fewer attackers or, for the same attackers, fewer defenders.
+    for a in range(1, max_attacker + 1):
+        for d in range(0, max_defender + 1):
+            if (a, d) not in _outcomes:
+                _outcomes[(a, d)] = _compute(a, d)
+    _extent[0] = max_attacker
+    _extent[1] = max_defender
+
+
+def battle_outcome(attacker_troops: int, defender_troops: int) -> BattleOutcome:
+    """Exact outcome distribution of attacking until one side can no longer fight"""
+    attacker_troops = max(1, attacker_troops)
+    defender_troops = max(0, defender_troops)
+    outcome = _outcomes.get((attacker_troops, defender_troops))
+    if outcome is None:
+        _extend(attacker_troops, defender_troops)
+        outcome = _outcomes[(attacker_troops, defender_troops)]
+    return outcome
+
+
+def win_probability(attacker_troops: int, defender_troops: int) -> float:
+    return battle_outcome(attacker_troops, defender_troops).win_probability
+
+
+def attack_score(attacker_troops: int, defender_troops: int) -> float:
+    """Exact value of the score AIPlayer.monte_carlo_simulate_attack estimates:
+    win rate * (1 - troops lost in won battles / attacker troops)"""
+    outcome = battle_outcome(attacker_troops, defender_troops)
+    if outcome.win_probability == 0:
+        return 0.0
+    lost_in_wins = sum((attacker_troops - k) * p for k, p in enumerate(outcome.attacker_survivors))
+    return outcome.win_probability * (1 - lost_in_wins / attacker_troops)
+
+
+def simulate_battles(attacker_troops: Sequence[int], defender_troops: Sequence[int],
+                     simulations: int = 1000, rng: np.random.Generator = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Sample `simulations` full battles for every (attacker, defender) pair at once.
+
+    All N x simulations battles advance in lockstep, one round of dice per
+    iteration, and finished battles drop out of the working set.  Returns the
+    final attacker and defender troops, each shaped (N, simulations).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    attackers = np.repeat(np.asarray(attacker_troops, dtype=np.int64), simulations)
+    defenders = np.repeat(np.asarray(defender_troops, dtype=np.int64), simulations)
+    dice_slots = np.arange(3)
+
+    active = np.flatnonzero((attackers > 1) & (defenders > 0))
+    while active.size:
+        a = attackers[active]
+        d = defenders[active]
+        attacker_dice = np.minimum(3, a - 1)
+        defender_dice = np.minimum(2, d)
+
+        # Unused dice roll 0 so they sort to the end
+        attacker_rolls = rng.integers(1, 7, size=(active.size, 3))
+        attacker_rolls[dice_slots >= attacker_dice[:, None]] = 0
+        attacker_rolls = -np.sort(-attacker_rolls, axis=1)
+        defender_rolls = rng.integers(1, 7, size=(active.size, 2))
+        defender_rolls[dice_slots[:2] >= defender_dice[:, None]] = 0
+        defender_rolls = -np.sort(-defender_rolls, axis=1)
+
+        compared = dice_slots[:2] < np.minimum(attacker_dice, defender_dice)[:, None]
+        attacker_wins = attacker_rolls[:, :2] > defender_rolls
+        defenders[active] = d - (compared & attacker_wins).sum(axis=1)
+        attackers[active] = a - (compared & ~attacker_wins).sum(axis=1)
+
+        active = active[(attackers[active] > 1) & (defenders[active] > 0)]
+
+    shape = (len(attacker_troops), simulations)
+    return attackers.reshape(shape), defenders.reshape(shape)
+
+
+def sample_attack_scores(attacker_troops: Sequence[int], defender_troops: Sequence[int],
+                         simulations: int = 1000, rng: np.random.Generator = None) -> np.ndarray:
+    """Sampled attack_score for every (attacker, defender) pair, from one simulate_battles call"""
+    initial = np.asarray(attacker_troops, dtype=np.float64)
+    final_attackers, final_defenders = simulate_battles(attacker_troops, defender_troops, simulations, rng)
+    wins = final_defenders <= 0
+    win_rate = wins.mean(axis=1)
+    avg_troops_lost = np.where(wins, initial[:, None] - final_attackers, 0).sum(axis=1) / simulations
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = win_rate * (1 - avg_troops_lost / initial)
+    return np.where(win_rate > 0, scores, 0.0)
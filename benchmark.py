@@ -0,0 +1,209 @@
+"""Micro-benchmarks for the engine and AI hot paths.
+
+Every benchmark starts from the same seeded two-player game, and every timed
+batch restarts the game's dice and the players' search streams from the
+same seed, so runs on one machine are comparable.  Results are written as
+JSON; --compare checks them against a stored baseline and flags anything
+that got slower than the threshold.
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+"""
+import argparse
+import copy
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from game_rng import GameRNG
+from simulation import create_ai_game
+
+SEED = 1234
+REPEAT = 5
+REGRESSION_THRESHOLD = 0.10  # Slower than baseline by more than this is a regression
+
+
+def _seed(game):
+    """Restart the game's dice and every AI player's search stream"""
+    game.rng = GameRNG(SEED)
+    for player in game.players:
+        if hasattr(player, 'rng'):
+            player.rng.seed(SEED)
+
+
+def _game(depth: int = 3):
+    game = create_ai_game(2, depth, seed=SEED)
+    return game, game.current_player
+
+
+def _border_pair(game) -> Tuple:
+    """A fixed (attacker, defender) pair of connected territories with different owners"""
+    for territory in game.territories.values():
+        if territory.owner is game.current_player:
+            for name in territory.connections:
+                neighbor = game.territories[name]
+                if neighbor.owner is not territory.owner:
+                    return territory, neighbor
+    raise RuntimeError("No border in the benchmark game")
+
+
+def bench_roll_dice() -> Tuple[Callable, object]:
+    game, _ = _game()
+    return lambda: game.roll_dice(3), game
+
+
+def bench_resolve_combat() -> Tuple[Callable, object]:
+    game, _ = _game()
+    attacker, defender = _border_pair(game)
+    attacker.troops, defender.troops = 10, 5
+    return lambda: game.resolve_combat(attacker, defender), game
+
+
+def bench_attack() -> Tuple[Callable, object]:
+    game, _ = _game()
+    attacker, defender = _border_pair(game)
+    # Armies this big never run out during a benchmark, so every call is one round
+    attacker.troops = defender.troops = 10 ** 9
+    return lambda: game.attack(attacker, defender), game
+
+
+def bench_calculate_reinforcements() -> Tuple[Callable, object]:
+    game, player = _game()
+    return lambda: game.calculate_reinforcements(player), game
+
+
+def _bench_choose_attack(depth: int) -> Tuple[Callable, object]:
+    game, player = _game(depth)
+
+    def run():
+        # Cold tables every call, like the first search of an attack phase
+        player.transposition_table.clear()
+        player.move_ordering.clear()
+        player.choose_attack(game)
+    return run, game
+
+
+def bench_monte_carlo_simulate_attack() -> Tuple[Callable, object]:
+    game, player = _game()
+    attacker, defender = _border_pair(game)
+    attacker.troops, defender.troops = 10, 5
+    return lambda: player.monte_carlo_simulate_attack(attacker, defender), game
+
+
+def bench_monte_carlo_simulate_attack_sampled() -> Tuple[Callable, object]:
+    game, player = _game()
+    player.exact_battle_odds = False
+    attacker, defender = _border_pair(game)
+    attacker.troops, defender.troops = 10, 5
+    return lambda: player.monte_carlo_simulate_attack(attacker, defender), game
+
+
+def bench_evaluate_territory() -> Tuple[Callable, object]:
+    game, player = _game()
+    territory = next(iter(player.territories))
+    return lambda: player.evaluate_territory(territory, game), game
+
+
+def bench_deepcopy_game() -> Tuple[Callable, object]:
+    game, _ = _game()
+    return lambda: copy.deepcopy(game), game
+
+
+# Each builds its game and returns (function to time, that game)
+BENCHMARKS: Dict[str, Callable[[], Tuple[Callable, object]]] = {
+    'roll_dice': bench_roll_dice,
+    'resolve_combat': bench_resolve_combat,
+    'attack': bench_attack,
+    'calculate_reinforcements': bench_calculate_reinforcements,
+    'choose_attack_depth1': lambda: _bench_choose_attack(1),
+    'choose_attack_depth2': lambda: _bench_choose_attack(2),
+    'choose_attack_depth3': lambda: _bench_choose_attack(3),
+    'choose_attack_depth4': lambda: _bench_choose_attack(4),
+    'monte_carlo_simulate_attack': bench_monte_carlo_simulate_attack,
+    'monte_carlo_simulate_attack_sampled': bench_monte_carlo_simulate_attack_sampled,
+    'evaluate_territory': bench_evaluate_territory,
+    'deepcopy_game': bench_deepcopy_game,
+}
+
+
+def run_benchmark(name: str, repeat: int = REPEAT) -> dict:
+    """Seconds per call: best and median over `repeat` timed batches"""
+    function, game = BENCHMARKS[name]()
+    _seed(game)
+    timer = timeit.Timer(function, setup=lambda: _seed(game))
+    number, _ = timer.autorange()
+    times = sorted(t / number for t in timer.repeat(repeat, number))
+    return {'best': times[0], 'median': times[len(times) // 2], 'number': number, 'repeat': repeat}
+
+
+def run_all(names: List[str], repeat: int = REPEAT) -> dict:
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(name, repeat)
+        print(f"{name:<40} {_format(results[name]['best']):>12} per call")
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': SEED,
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Print current against baseline best times and return the names that regressed"""
+    regressions = []
+    print(f"\n{'Benchmark':<40} {'Baseline':>12} {'Current':>12} {'Change':>8}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>12} {_format(result['best']):>12}")
+            continue
+        change = result['best'] / base['best'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<40} {_format(base['best']):>12} {_format(result['best']):>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine and AI micro-benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a saved run")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    current = run_all(names, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
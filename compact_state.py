@@ -0,0 +1,320 @@
+"""Compact array-backed game state for search and simulation.
+
+Territories are numbered in RiskGame.territories order and players by their
+position in RiskGame.players, so the hot loops of the AI work on small
+integers instead of Territory objects, name strings and owner.name lookups.
+
+Sets of territories are bitboards: bit i of a mask stands for territory i.
+Python ints grow as needed, so maps with more than 64 territories simply
+get wider masks.
+"""
+import random
+from array import array
+from typing import List, Tuple
+
+UNOWNED = -1
+
+# Zobrist hashing: one random 64-bit key per (territory, owner, troop bucket) and
+# per (player, attacks_lost) so the hash can be updated in O(1) by make/unmake.
+ZOBRIST_SEED = 0x5EED
+ZOBRIST_MAX_PLAYERS = 8
+TROOP_BUCKET = (0, 1, 2, 3, 4, 5, 6, 6, 7, 7, 8, 8, 8, 8, 9, 9, 9, 9, 9, 9)  # by troop count
+NUM_TROOP_BUCKETS = 11  # 20+ troops share the last bucket
+LOST_KEYS = 64
+
+_topology_cache = {}
+
+
+def troop_bucket(troops: int) -> int:
+    return TROOP_BUCKET[troops] if troops < len(TROOP_BUCKET) else NUM_TROOP_BUCKETS - 1
+
+
+def iter_bits(mask: int):
+    """Territory ids set in `mask`, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def to_mask(territories) -> int:
+    mask = 0
+    for territory in territories:
+        mask |= 1 << territory
+    return mask
+
+
+class MapTopology:
+    """Immutable territory graph shared by every CompactState on the same map.
+
+    The adjacency is stored in CSR form: the neighbours of territory i are
+    indices[indptr[i]:indptr[i + 1]].  `neighbors` holds the same rows as
+    tuples for cheap iteration and `neighbor_masks` as bitboards.  Duplicate
+    entries in Territory.connections (every edge is registered from both of
+    its ends) are collapsed.
+    """
+
+    def __init__(self, names: List[str], continents: List[str], continent_of: List[int],
+                 adjacency: List[List[int]], continent_bonus: List[int]):
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.continents = tuple(continents)
+        self.continent_of = tuple(continent_of)
+        self.continent_bonus = tuple(continent_bonus)
+        self.continent_members = tuple(
+            tuple(i for i, c in enumerate(self.continent_of) if c == continent)
+            for continent in range(len(self.continents))
+        )
+
+        indptr = [0]
+        indices = []
+        for row in adjacency:
+            indices.extend(sorted(set(row)))
+            indptr.append(len(indices))
+        self.indptr = tuple(indptr)
+        self.indices = tuple(indices)
+        self.neighbors = tuple(self.indices[indptr[i]:indptr[i + 1]] for i in range(len(self.names)))
+        self.neighbor_masks = tuple(to_mask(row) for row in self.neighbors)
+        self.continent_masks = tuple(to_mask(members) for members in self.continent_members)
+        self.all_mask = (1 << len(self.names)) - 1
+
+        rng = random.Random(ZOBRIST_SEED)
+        # zobrist_territory[t][(owner + 1) * NUM_TROOP_BUCKETS + bucket], owner + 1 so UNOWNED maps to 0
+        self.zobrist_territory = tuple(
+            tuple(rng.getrandbits(64) for _ in range((ZOBRIST_MAX_PLAYERS + 1) * NUM_TROOP_BUCKETS))
+            for _ in self.names
+        )
+        # zobrist_lost[player][attacks_lost % LOST_KEYS]
+        self.zobrist_lost = tuple(
+            tuple(rng.getrandbits(64) for _ in range(LOST_KEYS)) for _ in range(ZOBRIST_MAX_PLAYERS)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __reduce__(self):
+        # Rebuild from the plain lists when pickled into worker processes
+        return (_rebuild_topology, (self.names, self.continents, self.continent_of,
+                                    self.neighbors, self.continent_bonus))
+
+    @classmethod
+    def from_game(cls, game) -> 'MapTopology':
+        """Return the shared topology for the map of `game`"""
+        names = tuple(game.territories)
+        key = (names, tuple(tuple(t.connections) for t in game.territories.values()))
+        topology = _topology_cache.get(key)
+        if topology is None:
+            continents = list(game.continent_bonus)
+            for territory in game.territories.values():
+                if territory.continent not in continents:
+                    continents.append(territory.continent)
+            index = {name: i for i, name in enumerate(names)}
+            topology = cls(
+                list(names),
+                continents,
+                [continents.index(t.continent) for t in game.territories.values()],
+                [[index[c] for c in t.connections] for t in game.territories.values()],
+                [game.continent_bonus.get(c, 0) for c in continents],
+            )
+            _topology_cache[key] = topology
+        return topology
+
+
+def _rebuild_topology(names, continents, continent_of, neighbors, continent_bonus) -> MapTopology:
+    key = (names, neighbors)
+    topology = _topology_cache.get(key)
+    if topology is None:
+        topology = MapTopology(list(names), list(continents), list(continent_of),
+                               [list(row) for row in neighbors], list(continent_bonus))
+        _topology_cache[key] = topology
+    return topology
+
+
+class CompactState:
+    """Owner and troop vectors for one position, indexed by territory id.
+
+    Search mutates a single state in place: make_attack pushes what it
+    changes onto `history` and unmake_attack pops it back off.
+    """
+
+    __slots__ = ('topology', 'owner', 'troops', 'attacks_lost', 'current', 'history', 'hash', 'owned')
+
+    def __init__(self, topology: MapTopology, owner: array, troops: array,
+                 attacks_lost: array, current: int):
+        if len(attacks_lost) > ZOBRIST_MAX_PLAYERS:
+            raise ValueError(f"At most {ZOBRIST_MAX_PLAYERS} players are supported")
+        self.topology = topology
+        self.owner = owner                # array('b'): player index per territory, UNOWNED if none
+        self.troops = troops              # array('i'): troops per territory
+        self.attacks_lost = attacks_lost  # array('i'): battle_stats['attacks_lost'] per player
+        self.current = current            # index of the player to move
+        self.history = []                 # flat undo stack: src, dst, src troops, dst troops, dst owner, hash
+        self.hash = self.compute_hash()   # Zobrist hash, kept up to date by apply_attack_result
+        # owned[p]: bitboard of player p's territories; the extra last entry holds the
+        # unowned ones, so owned[UNOWNED] works like any other owner
+        self.owned = [0] * (len(attacks_lost) + 1)
+        for i, player in enumerate(owner):
+            self.owned[player] |= 1 << i
+
+    def compute_hash(self) -> int:
+        """Zobrist hash of the position from scratch"""
+        keys = self.topology.zobrist_territory
+        h = 0
+        for i, (owner, troops) in enumerate(zip(self.owner, self.troops)):
+            h ^= keys[i][(owner + 1) * NUM_TROOP_BUCKETS + troop_bucket(troops)]
+        lost_keys = self.topology.zobrist_lost
+        for player, lost in enumerate(self.attacks_lost):
+            h ^= lost_keys[player][lost % LOST_KEYS]
+        return h
+
+    def _territory_key(self, territory: int) -> int:
+        troops = self.troops[territory]
+        bucket = TROOP_BUCKET[troops] if troops < len(TROOP_BUCKET) else NUM_TROOP_BUCKETS - 1
+        return self.topology.zobrist_territory[territory][(self.owner[territory] + 1) * NUM_TROOP_BUCKETS + bucket]
+
+    @classmethod
+    def from_game(cls, game) -> 'CompactState':
+        topology = MapTopology.from_game(game)
+        player_index = {id(player): i for i, player in enumerate(game.players)}
+        owner = array('b', [UNOWNED if t.owner is None else player_index[id(t.owner)]
+                            for t in game.territories.values()])
+        troops = array('i', [t.troops for t in game.territories.values()])
+        attacks_lost = array('i', [p.battle_stats['attacks_lost'] for p in game.players])
+        current = player_index.get(id(game.current_player), 0)
+        return cls(topology, owner, troops, attacks_lost, current)
+
+    def apply_to(self, game):
+        """Write this position back into `game`, which must have the same map and players"""
+        for player_id, player in enumerate(game.players):
+            player.battle_stats['attacks_lost'] = self.attacks_lost[player_id]
+
+        # Changed owners go through the game's ownership index, which keeps the
+        # territories a player still holds in order and appends the new ones
+        for i, territory in enumerate(game.territories.values()):
+            owner = None if self.owner[i] == UNOWNED else game.players[self.owner[i]]
+            if territory.owner is not owner:
+                game.transfer_territory(territory, owner)
+            territory.troops = self.troops[i]
+
+        if game.players:
+            game.current_player = game.players[self.current]
+        return game
+
+    def copy(self) -> 'CompactState':
+        return CompactState(self.topology, array('b', self.owner), array('i', self.troops),
+                            array('i', self.attacks_lost), self.current)
+
+    def next_player(self, player: int) -> int:
+        return (player + 1) % len(self.attacks_lost)
+
+    def territory_count(self, player: int) -> int:
+        return self.owned[player].bit_count()
+
+    def owns_continent(self, player: int, continent: int) -> bool:
+        mask = self.topology.continent_masks[continent]
+        return self.owned[player] & mask == mask
+
+    def enemy_neighbors(self, territory: int) -> int:
+        """Bitboard of the neighbours of `territory` held by someone else"""
+        return self.topology.neighbor_masks[territory] & ~self.owned[self.owner[territory]]
+
+    def border_mask(self, player: int) -> int:
+        """Bitboard of `player`'s territories with at least one enemy neighbour"""
+        owned = self.owned[player]
+        neighbor_masks = self.topology.neighbor_masks
+        border = 0
+        for territory in iter_bits(owned):
+            if neighbor_masks[territory] & ~owned:
+                border |= 1 << territory
+        return border
+
+    def attack_actions(self, player: int) -> List[Tuple[int, int]]:
+        """All legal (src, dst) attacks for `player`"""
+        # A plain scan of the owner array beats walking the bits of owned[player]
+        # in pure Python at this map size, so attack generation stays a loop
+        owner = self.owner
+        troops = self.troops
+        neighbors = self.topology.neighbors
+        actions = []
+        for src in range(len(owner)):
+            if owner[src] == player and troops[src] > 1:
+                for dst in neighbors[src]:
+                    if owner[dst] != player:
+                        actions.append((src, dst))
+        return actions
+
+    def roll_losses(self, src: int, dst: int, rng=random) -> Tuple[int, int]:
+        """Roll one round of dice the way RiskGame.resolve_combat does"""
+        attacker_dice = min(3, self.troops[src] - 1)
+        defender_dice = min(2, self.troops[dst])
+        attacker_rolls = sorted([rng.randint(1, 6) for _ in range(attacker_dice)], reverse=True)
+        defender_rolls = sorted([rng.randint(1, 6) for _ in range(defender_dice)], reverse=True)
+
+        attacker_losses = 0
+        defender_losses = 0
+        for a_roll, d_roll in zip(attacker_rolls, defender_rolls):
+            if a_roll > d_roll:
+                defender_losses += 1
+            else:
+                attacker_losses += 1
+        return attacker_losses, defender_losses
+
+    def apply_attack_result(self, src: int, dst: int, attacker_losses: int, defender_losses: int) -> bool:
+        """Apply a rolled round to the board; returns True if `dst` was captured"""
+        troops = self.troops
+        attacks_lost = self.attacks_lost
+        lost_keys = self.topology.zobrist_lost
+        h = self.hash ^ self._territory_key(src) ^ self._territory_key(dst)
+
+        troops[src] -= attacker_losses
+        troops[dst] -= defender_losses
+
+        captured = troops[dst] <= 0
+        if captured:
+            loser = self.owner[dst]
+            self.owner[dst] = self.owner[src]
+            bit = 1 << dst
+            self.owned[loser] ^= bit
+            self.owned[self.owner[src]] |= bit
+            troops[dst] = troops[src] - 1
+            troops[src] = 1
+        else:
+            loser = self.owner[src]
+        h ^= lost_keys[loser][attacks_lost[loser] % LOST_KEYS]
+        attacks_lost[loser] += 1
+        h ^= lost_keys[loser][attacks_lost[loser] % LOST_KEYS]
+
+        self.hash = h ^ self._territory_key(src) ^ self._territory_key(dst)
+        return captured
+
+    def make_attack(self, src: int, dst: int, attacker_losses: int, defender_losses: int) -> bool:
+        """apply_attack_result that can be taken back with unmake_attack"""
+        self.history.extend((src, dst, self.troops[src], self.troops[dst], self.owner[dst], self.hash))
+        return self.apply_attack_result(src, dst, attacker_losses, defender_losses)
+
+    def unmake_attack(self):
+        """Restore the board to before the most recent make_attack"""
+        history = self.history
+        self.hash = history.pop()
+        dst_owner = history.pop()
+        dst_troops = history.pop()
+        src_troops = history.pop()
+        dst = history.pop()
+        src = history.pop()
+
+        if self.owner[dst] != dst_owner:
+            # Captured: the defender took the loss
+            self.attacks_lost[dst_owner] -= 1
+            bit = 1 << dst
+            self.owned[self.owner[dst]] ^= bit
+            self.owned[dst_owner] |= bit
+            self.owner[dst] = dst_owner
+        else:
+            self.attacks_lost[self.owner[src]] -= 1
+        self.troops[src] = src_troops
+        self.troops[dst] = dst_troops
+
+    def simulate_attack(self, src: int, dst: int, rng=random) -> bool:
+        """Roll and apply one attack, like RiskGame.attack without the validation"""
+        attacker_losses, defender_losses = self.roll_losses(src, dst, rng)
+        return self.apply_attack_result(src, dst, attacker_losses, defender_losses)
@@ -0,0 +1,80 @@
+"""Frame pacing for the pygame windows.
+
+RiskGUI and MenuGUI used to poll the event queue and redraw as fast as the
+CPU allowed.  A FrameScheduler caps the frame rate and, when no event is
+waiting, sleeps in pygame.event.wait until one arrives (or the idle timeout
+passes), so a window showing an unchanged board costs almost no CPU.  It
+also keeps frame-time statistics to check that.
+"""
+import time
+from collections import deque
+from typing import List
+
+import pygame
+
+DEFAULT_FPS = 60
+IDLE_TIMEOUT_MS = 500  # Longest sleep without events, so the loop still wakes up now and then
+STATS_WINDOW = 600  # Frames the percentiles are taken over
+
+
+class FrameScheduler:
+    def __init__(self, fps: int = DEFAULT_FPS, idle_timeout: int = IDLE_TIMEOUT_MS):
+        if fps < 1:
+            raise ValueError("fps must be at least 1")
+        self.fps = fps
+        self.idle_timeout = idle_timeout
+        self.clock = pygame.time.Clock()
+        self.frame_times = deque(maxlen=STATS_WINDOW)  # Seconds of work per frame, waits excluded
+        self.frames = 0
+        self.idle_time = 0.0  # Seconds spent waiting, for events or for the frame cap
+        self._started = time.perf_counter()
+        self._frame_start = None
+
+    def wait_events(self, busy: bool = False) -> List[pygame.event.Event]:
+        """
+        End the current frame and return the next frame's events: at most
+        fps frames a second, and when nothing is queued, block until an event
+        arrives or idle_timeout passes (then the list is empty). A `busy`
+        caller, e.g. one animating, never blocks beyond the frame cap.
+        """
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.frame_times.append(now - self._frame_start)
+            self.frames += 1
+        self.clock.tick(self.fps)
+
+        # The first frame never blocks so the window is drawn straight away
+        if self._frame_start is not None and not busy and not pygame.event.peek():
+            event = pygame.event.wait(self.idle_timeout)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+        else:
+            events = pygame.event.get()
+        self._frame_start = time.perf_counter()
+        self.idle_time += self._frame_start - now
+        return events
+
+    def stats(self) -> dict:
+        """Frame counts and times in milliseconds, and the share of wall time spent idle"""
+        elapsed = time.perf_counter() - self._started
+        times = sorted(self.frame_times)
+        if times:
+            mean = sum(times) / len(times)
+            p95 = times[min(len(times) - 1, int(0.95 * len(times)))]
+            worst = times[-1]
+        else:
+            mean = p95 = worst = 0.0
+        return {
+            'frames': self.frames,
+            'fps': self.frames / elapsed if elapsed else 0.0,
+            'frame_ms_mean': mean * 1000,
+            'frame_ms_p95': p95 * 1000,
+            'frame_ms_max': worst * 1000,
+            'idle_share': self.idle_time / elapsed if elapsed else 0.0,
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{stats['frames']} frames at {stats['fps']:.1f} fps (cap {self.fps}), "
+                f"frame time mean {stats['frame_ms_mean']:.2f} ms, p95 {stats['frame_ms_p95']:.2f} ms, "
+                f"max {stats['frame_ms_max']:.2f} ms, idle {stats['idle_share']:.0%}")
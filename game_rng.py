@@ -0,0 +1,74 @@
+"""A game's own random stream.
+
+Every RiskGame draws its dice, deal, deck order and random events from one
+GameRNG instead of the random module, so games running side by side never
+disturb each other and a seed replays a game bit for bit.  Dice come from a
+buffer of pre-generated rolls that is refilled in bulk, which keeps the
+per-roll cost far below one numpy call.
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+DICE_BUFFER = 4096  # Rolls generated per refill
+
+
+class GameRNG:
+    """Seedable PCG64 stream with a dice buffer; getstate/setstate round-trip through JSON"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self._dice = []
+        self._position = 0
+        self._refill_state = None  # Generator state the current buffer was drawn from
+
+    def _refill(self):
+        self._refill_state = self.generator.bit_generator.state
+        self._dice = self.generator.integers(1, 7, DICE_BUFFER, dtype=np.int8).tolist()
+        self._position = 0
+
+    def roll_dice(self, num_dice: int) -> List[int]:
+        """num_dice rolls, highest first"""
+        if self._position + num_dice > len(self._dice):
+            self._refill()
+        rolls = self._dice[self._position:self._position + num_dice]
+        self._position += num_dice
+        rolls.sort(reverse=True)
+        return rolls
+
+    def randint(self, low: int, high: int) -> int:
+        """Integer in [low, high], both ends included like random.randint"""
+        return int(self.generator.integers(low, high + 1))
+
+    def choice(self, items: Sequence):
+        if not items:
+            raise IndexError("Cannot choose from an empty sequence")
+        return items[int(self.generator.integers(len(items)))]
+
+    def sample(self, items: Sequence, k: int) -> list:
+        return [items[i] for i in self.generator.choice(len(items), k, replace=False)]
+
+    def shuffle(self, items: list):
+        order = self.generator.permutation(len(items))
+        items[:] = [items[i] for i in order]
+
+    def spawn_seed(self) -> int:
+        """A seed for a stream of its own, e.g. an AI player's"""
+        return int(self.generator.integers(2 ** 63))
+
+    def getstate(self) -> dict:
+        return {
+            'generator': self.generator.bit_generator.state,
+            'refill': self._refill_state,
+            'position': self._position,
+        }
+
+    def setstate(self, state: dict):
+        if state['refill'] is None:
+            self._dice, self._position, self._refill_state = [], 0, None
+        else:
+            # Redraw the buffer from the state it came from rather than storing every roll
+            self.generator.bit_generator.state = state['refill']
+            self._refill()
+            self._position = state['position']
+        self.generator.bit_generator.state = state['generator']
@@ -4,13 +4,20 @@ import random
 from pygame.locals import *
 from typing import Dict, Tuple, List
 from project import RiskGame, Territory, Player, AIPlayer
+import savegame
+from ai_worker import AITurn, DONE, FAILED
+from frame_scheduler import FrameScheduler, DEFAULT_FPS
+from text_cache import TextCache
 
 # Initialize Pygame
 pygame.init()
 
+AI_MOVE_DELAY_MS = 500  # How long each AI move stays on screen before the next one
+
 class RiskGUI:
-    def __init__(self, game: RiskGame):
+    def __init__(self, game: RiskGame, fps: int = DEFAULT_FPS):
         self.game = game
+        self.scheduler = FrameScheduler(fps)  # Caps the frame rate and sleeps while nothing happens
         self.screen_width = 1366  # Standard laptop width
         self.screen_height = 720
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
@@ -38,17 +45,35 @@ class RiskGUI:
         # Territory positions (simplified for now)
         self.territory_positions = self._initialize_territory_positions()
         
+        # Ocean, continents and connections never change, so they are drawn once into this surface
+        self._background = None
+        
         # Fonts
         self.font = pygame.font.Font(None, 20)  # Slightly smaller font
         self.title_font = pygame.font.Font(None, 32)
         self.event_font = pygame.font.Font(None, 40)
         self.continent_font = pygame.font.Font(None, 36)  # New font for continent names
         
+        # Dirty-rectangle rendering: what the screen shows now, and the area each part covers
+        self._drawn = None  # _frame_state() of the last render, None forces a full redraw
+        self._territory_rects = {
+            name: pygame.Rect(x - 27, y - 27, 54, 54).union(
+                pygame.Rect((x - 30, y - 35), self.font.size(name)))
+            for name, (x, y) in self.territory_positions.items()
+        }
+        self._hud_text_rect = pygame.Rect(0, self.screen_height - 190, self.screen_width // 2, 150)
+        
+        # Rendered text is cached by (font, text, colour); territory names are rendered up front
+        self.text_cache = TextCache()
+        for name in self.territory_positions:
+            self.text_cache.render(self.font, name, self.BLACK)
+        
         # Game state
         self.selected_territory = None
         self.target_territory = None
-        self.phase = "reinforcement"  # reinforcement, attack, fortify
         self.current_player = game.current_player
+        self.ai_turn = None  # AITurn searching on a worker while an AI player moves
+        self._ai_resume_at = 0  # pygame ticks when the next AI move may be shown
         
         # Button properties
         self.button_rect = pygame.Rect(self.screen_width - 150, 20, 120, 40)
@@ -151,11 +176,11 @@ class RiskGUI:
         pygame.draw.circle(self.screen, self.BLACK, (x, y), 20, 2)  # Reduced from 30 to 20
         
         # Draw territory name
-        name_text = self.font.render(territory.name, True, self.BLACK)
+        name_text = self.text_cache.render(self.font, territory.name, self.BLACK)
         self.screen.blit(name_text, (x - 30, y - 35))  # Adjusted position
         
         # Draw troop count
-        troop_text = self.font.render(str(territory.troops), True, self.BLACK)
+        troop_text = self.text_cache.render(self.font, str(territory.troops), self.BLACK)
         self.screen.blit(troop_text, (x - 5, y - 7))  # Adjusted position
         
         # Draw selection highlight
@@ -164,7 +189,8 @@ class RiskGUI:
         elif self.target_territory == territory:
             pygame.draw.circle(self.screen, (0, 50, 0), (x, y), 25, 3)
     
-    def draw_connections(self):
+    def draw_connections(self, surface: pygame.Surface = None):
+        surface = surface or self.screen
         for territory in self.game.territories.values():
             start_pos = self.territory_positions[territory.name]
             for connection in territory.connections:
@@ -188,10 +214,10 @@ class RiskGUI:
                     points.append(end_pos)
                     
                     # Draw the curved line
-                    pygame.draw.lines(self.screen, self.BLACK, False, points, 2)
+                    pygame.draw.lines(surface, self.BLACK, False, points, 2)
                 else:
                     # Regular straight line for other connections
-                    pygame.draw.line(self.screen, self.BLACK, start_pos, end_pos, 2)
+                    pygame.draw.line(surface, self.BLACK, start_pos, end_pos, 2)
     
     def draw_game_info(self):
         # Calculate bottom left position
@@ -199,34 +225,34 @@ class RiskGUI:
         left_margin = 20
         
         # Draw current player
-        player_text = self.title_font.render(
+        player_text = self.text_cache.render(
+            self.title_font,
             f"Current Player: {self.current_player.name}", 
-            True, 
             self.current_player.color
         )
         self.screen.blit(player_text, (left_margin, self.screen_height - bottom_margin - 80))
         
         # Draw phase
-        phase_text = self.title_font.render(
+        phase_text = self.text_cache.render(
+            self.title_font,
             f"Phase: {self.phase.capitalize()}", 
-            True, 
             self.BLACK
         )
         self.screen.blit(phase_text, (left_margin, self.screen_height - bottom_margin - 40))
         
         # Draw reinforcements
         if self.phase == "reinforcement":
-            reinforce_text = self.font.render(
+            reinforce_text = self.text_cache.render(
+                self.font,
                 f"Available Reinforcements: {self.current_player.reinforcements}",
-                True,
                 self.BLACK
             )
             self.screen.blit(reinforce_text, (left_margin, self.screen_height - bottom_margin))
         
         # Draw cards
-        cards_text = self.font.render(
+        cards_text = self.text_cache.render(
+            self.font,
             f"Cards: {[card.type for card in self.current_player.cards]}",
-            True,
             self.BLACK
         )
         self.screen.blit(cards_text, (left_margin, self.screen_height - bottom_margin + 20))
@@ -236,7 +262,7 @@ class RiskGUI:
         pygame.draw.rect(self.screen, button_color, self.button_rect)
         pygame.draw.rect(self.screen, self.BLACK, self.button_rect, 2)
         
-        button_text = self.font.render("Next Phase", True, self.WHITE)
+        button_text = self.text_cache.render(self.font, "Next Phase", self.WHITE)
         text_rect = button_text.get_rect(center=self.button_rect.center)
         self.screen.blit(button_text, text_rect)
         
@@ -245,10 +271,19 @@ class RiskGUI:
         pygame.draw.rect(self.screen, info_button_color, self.info_button_rect)
         pygame.draw.rect(self.screen, self.BLACK, self.info_button_rect, 2)
         
-        info_button_text = self.font.render("Player Info", True, self.WHITE)
+        info_button_text = self.text_cache.render(self.font, "Player Info", self.WHITE)
         info_text_rect = info_button_text.get_rect(center=self.info_button_rect.center)
         self.screen.blit(info_button_text, info_text_rect)
     
+    @property
+    def phase(self) -> str:
+        """reinforcement, attack or fortify; kept on the game so it is saved and journaled"""
+        return self.game.phase
+
+    @phase.setter
+    def phase(self, phase: str):
+        self.game.set_phase(phase)
+
     def handle_click(self, pos: Tuple[int, int]):
         x, y = pos
         for territory_name, territory_pos in self.territory_positions.items():
@@ -263,8 +298,7 @@ class RiskGUI:
         if territory.owner == self.current_player:
             if self.current_player.reinforcements > 0:
                 # Place one troop
-                territory.troops += 1
-                self.current_player.reinforcements -= 1
+                self.game.reinforce(territory)
                 # Highlight the territory being reinforced
                 self.selected_territory = territory
                 pygame.time.delay(500)  # Short delay for visual feedback
@@ -272,11 +306,10 @@ class RiskGUI:
 
     
     def handle_territory_click(self, territory: Territory):
+        if self.ai_turn is not None:
+            return  # The board is the AI's until its turn ends
         if self.phase == "reinforcement":
-            if isinstance(self.current_player, AIPlayer):
-                self.handle_ai_reinforcement()
-            else:
-                self.handle_player_reinforcement(territory)
+            self.handle_player_reinforcement(territory)
         elif self.phase == "attack":
             if self.selected_territory is None:
                 if territory.owner == self.current_player and territory.troops > 1:
@@ -305,6 +338,7 @@ class RiskGUI:
     
     def show_event_popup(self, event):
         self.showing_event = True
+        self._drawn = None
         self.current_event = event
         
         # Create semi-transparent overlay
@@ -319,81 +353,26 @@ class RiskGUI:
         pygame.draw.rect(self.screen, self.WHITE, popup_rect, 2)
         
         # Draw event title
-        title_text = self.event_font.render("Random Event!", True, self.WHITE)
+        title_text = self.text_cache.render(self.event_font, "Random Event!", self.WHITE)
         title_rect = title_text.get_rect(center=(self.screen_width//2, self.screen_height//2 - 60))
         self.screen.blit(title_text, title_rect)
         
         # Draw event name
-        name_text = self.font.render(event.name, True, self.WHITE)
+        name_text = self.text_cache.render(self.font, event.name, self.WHITE)
         name_rect = name_text.get_rect(center=(self.screen_width//2, self.screen_height//2 - 20))
         self.screen.blit(name_text, name_rect)
         
-        # Draw event description with specific values
+        # Draw event description with the values the game picked; the effect has already been applied
         description = event.description
-        if event.name == "Natural Disaster":
-            continent = random.choice(list(set(t.continent for t in self.game.territories.values())))
-            description = description.replace("a random continent", f"the continent of {continent}")
-            # Apply effect
-            for territory in self.game.territories.values():
-                if territory.continent == continent and territory.owner == self.current_player:
-                    territory.troops = max(0, territory.troops - 1)
-        elif event.name == "Reinforcement":
-            player_territories = [t for t in self.game.territories.values() if t.owner == self.current_player]
-            if player_territories:
-                territory = random.choice(player_territories)
-                description = description.replace("a random territory", f"the territory of {territory.name}")
-                # Apply effect
-                territory.troops += 2
-        elif event.name == "Territory Swap":
-            territories = list(self.game.territories.values())
-            if len(territories) >= 2:
-                territory1, territory2 = random.sample(territories, 2)
-                description = description.replace("two random territories", f"{territory1.name} and {territory2.name}")
-                # Apply effect
-                owner1 = territory1.owner
-                owner2 = territory2.owner
-                if owner1 and owner2:
-                    territory1.owner.territories.remove(territory1)
-                    territory2.owner.territories.remove(territory2)
-                    territory1.owner = owner2
-                    territory2.owner = owner1
-                    owner2.territories.append(territory1)
-                    owner1.territories.append(territory2)
-        elif event.name == "Border Dispute":
-            territories = list(self.game.territories.values())
-            if len(territories) >= 2:
-                territory1 = random.choice(territories)
-                connected = [t for t in territories if t.name in territory1.connections]
-                if connected:
-                    territory2 = random.choice(connected)
-                    description = description.replace("Two random connected territories", f"{territory1.name} and {territory2.name}")
-                    # Apply effect
-                    territory1.troops = max(0, territory1.troops - 1)
-                    territory2.troops = max(0, territory2.troops - 1)
-        elif event.name == "Alliance":
-            continent = random.choice(list(set(t.continent for t in self.game.territories.values())))
-            description = description.replace("a random continent", f"the continent of {continent}")
-            # Apply effect
-            for territory in self.game.territories.values():
-                if territory.continent == continent:
-                    territory.troops += 1
-        elif event.name == "Civil War":
-            affected_territories = [t.name for t in self.game.territories.values() if t.owner == self.current_player and t.troops > 2]
-            if affected_territories:
-                description = description.replace("All territories", f"Territories {', '.join(affected_territories)}")
-                # Apply effect
-                for territory in self.game.territories.values():
-                    if territory.owner == self.current_player and territory.troops > 2:
-                        territory.troops -= 1
-        elif event.name == "Disease":
-            # Apply effect
-            for territory in self.game.territories.values():
-                if territory.owner == self.current_player and territory.troops > 3:
-                    territory.troops -= 1
-        elif event.name == "Economic Boom":
-            # Apply effect
-            for territory in self.game.territories.values():
-                territory.troops += 1
+        chosen = event.chosen_values
+        if 'continent' in chosen:
+            description = description.replace("a random continent", f"the continent of {chosen['continent']}")
+        if 'territory' in chosen:
+            description = description.replace("a random territory", f"the territory of {chosen['territory']}")
+        if len(chosen.get('territories', ())) == 2:
+            names = ' and '.join(chosen['territories'])
+            description = description.replace("two random territories", names)
+            description = description.replace("Two random connected territories", names)
         
         # Split description into multiple lines if needed
         words = description.split()
@@ -411,7 +390,7 @@ class RiskGUI:
         
         # Draw each line of the description
         for i, line in enumerate(lines):
-            desc_text = self.font.render(line, True, self.WHITE)
+            desc_text = self.text_cache.render(self.font, line, self.WHITE)
             desc_rect = desc_text.get_rect(center=(self.screen_width//2, self.screen_height//2 + 20 + i*25))
             self.screen.blit(desc_text, desc_rect)
         
@@ -420,13 +399,14 @@ class RiskGUI:
         pygame.draw.rect(self.screen, button_color, self.event_button_rect)
         pygame.draw.rect(self.screen, self.WHITE, self.event_button_rect, 2)
         
-        continue_text = self.font.render("Continue", True, self.WHITE)
+        continue_text = self.text_cache.render(self.font, "Continue", self.WHITE)
         text_rect = continue_text.get_rect(center=self.event_button_rect.center)
         self.screen.blit(continue_text, text_rect)
         
         pygame.display.flip()
 
-    def draw_continent_boundaries(self):
+    def draw_continent_boundaries(self, surface: pygame.Surface = None):
+        surface = surface or self.screen
         # Define continent regions (x, y, width, height)
         continent_regions = {
             "North America": (50, 50, 470, 350),
@@ -440,12 +420,12 @@ class RiskGUI:
         # Draw each continent's region
         for continent, region in continent_regions.items():
             # Draw the continent region
-            pygame.draw.rect(self.screen, self.continent_colors[continent], region)
+            pygame.draw.rect(surface, self.continent_colors[continent], region)
             # Draw the border
-            pygame.draw.rect(self.screen, self.BLACK, region, 2)
+            pygame.draw.rect(surface, self.BLACK, region, 2)
             
             # Draw continent name with the new font
-            name_text = self.continent_font.render(continent, True, self.BLACK)
+            name_text = self.text_cache.render(self.continent_font, continent, self.BLACK)
             x = region[0] + region[2]//2 - name_text.get_width()//2
             
             # Position Africa, Australia, and South America's names below their regions, others above
@@ -454,10 +434,24 @@ class RiskGUI:
             else:
                 y = region[1] - 25  # Position above the region
                 
-            self.screen.blit(name_text, (x, y))
+            surface.blit(name_text, (x, y))
+
+    def draw_background(self, area: pygame.Rect = None):
+        """Blit the static map (or one area of it), baking it first if there is none yet for this window size"""
+        if self._background is None or self._background.get_size() != self.screen.get_size():
+            background = pygame.Surface(self.screen.get_size()).convert()
+            background.fill(self.OCEAN_BLUE)
+            self.draw_continent_boundaries(background)
+            self.draw_connections(background)
+            self._background = background
+        if area is None:
+            self.screen.blit(self._background, (0, 0))
+        else:
+            self.screen.blit(self._background, area, area)
 
     def show_card_prompt(self):
         self.showing_card_prompt = True
+        self._drawn = None
         
         # Create semi-transparent overlay
         overlay = pygame.Surface((self.screen_width, self.screen_height))
@@ -471,30 +465,30 @@ class RiskGUI:
         pygame.draw.rect(self.screen, self.WHITE, popup_rect, 2)
         
         # Draw title
-        title_text = self.event_font.render("Trade Cards?", True, self.WHITE)
+        title_text = self.text_cache.render(self.event_font, "Trade Cards?", self.WHITE)
         title_rect = title_text.get_rect(center=(self.screen_width//2, self.screen_height//2 - 60))
         self.screen.blit(title_text, title_rect)
         
         # Draw card information
-        card_text = self.font.render(f"Your cards: {[card.type for card in self.current_player.cards]}", True, self.WHITE)
+        card_text = self.text_cache.render(self.font, f"Your cards: {[card.type for card in self.current_player.cards]}", self.WHITE)
         card_rect = card_text.get_rect(center=(self.screen_width//2, self.screen_height//2 - 20))
         self.screen.blit(card_text, card_rect)
         
         # Draw reinforcement information
-        reinforce_text = self.font.render("Trade cards for reinforcements?", True, self.WHITE)
+        reinforce_text = self.text_cache.render(self.font, "Trade cards for reinforcements?", self.WHITE)
         reinforce_rect = reinforce_text.get_rect(center=(self.screen_width//2, self.screen_height//2 + 20))
         self.screen.blit(reinforce_text, reinforce_rect)
         
         # Draw Yes/No buttons
         pygame.draw.rect(self.screen, self.BUTTON_HOVER_COLOR if self.card_yes_hovered else self.BUTTON_COLOR, self.card_yes_rect)
         pygame.draw.rect(self.screen, self.WHITE, self.card_yes_rect, 2)
-        yes_text = self.font.render("Yes", True, self.WHITE)
+        yes_text = self.text_cache.render(self.font, "Yes", self.WHITE)
         yes_rect = yes_text.get_rect(center=self.card_yes_rect.center)
         self.screen.blit(yes_text, yes_rect)
         
         pygame.draw.rect(self.screen, self.BUTTON_HOVER_COLOR if self.card_no_hovered else self.BUTTON_COLOR, self.card_no_rect)
         pygame.draw.rect(self.screen, self.WHITE, self.card_no_rect, 2)
-        no_text = self.font.render("No", True, self.WHITE)
+        no_text = self.text_cache.render(self.font, "No", self.WHITE)
         no_rect = no_text.get_rect(center=self.card_no_rect.center)
         self.screen.blit(no_text, no_rect)
         
@@ -522,7 +516,7 @@ class RiskGUI:
         pygame.draw.rect(self.screen, self.WHITE, popup_rect, 2)
         
         # Draw title
-        title_text = self.title_font.render("Player Information", True, self.WHITE)
+        title_text = self.text_cache.render(self.title_font, "Player Information", self.WHITE)
         title_rect = title_text.get_rect(center=(self.screen_width//2, popup_rect.top + 40))
         self.screen.blit(title_text, title_rect)
         
@@ -530,21 +524,21 @@ class RiskGUI:
         y_offset = popup_rect.top + 80
         for player in self.game.players:
             # Player name and color
-            name_text = self.font.render(f"{player.name}:", True, player.color)
+            name_text = self.text_cache.render(self.font, f"{player.name}:", player.color)
             self.screen.blit(name_text, (popup_rect.left + 20, y_offset))
             
             # Territories count
-            territory_text = self.font.render(
+            territory_text = self.text_cache.render(
+                self.font,
                 f"Territories: {len(player.territories)}",
-                True,
                 self.WHITE
             )
             self.screen.blit(territory_text, (popup_rect.left + 20, y_offset + 30))
             
             # Card count
-            card_text = self.font.render(
+            card_text = self.text_cache.render(
+                self.font,
                 f"Cards: {len(player.cards)}",
-                True,
                 self.WHITE
             )
             self.screen.blit(card_text, (popup_rect.left + 20, y_offset + 60))
@@ -561,7 +555,7 @@ class RiskGUI:
         pygame.draw.rect(self.screen, self.BUTTON_COLOR, close_button_rect)
         pygame.draw.rect(self.screen, self.WHITE, close_button_rect, 2)
         
-        close_text = self.font.render("Close", True, self.WHITE)
+        close_text = self.text_cache.render(self.font, "Close", self.WHITE)
         close_rect = close_text.get_rect(center=close_button_rect.center)
         self.screen.blit(close_text, close_rect)
         
@@ -569,71 +563,132 @@ class RiskGUI:
 
         pygame.display.flip()
 
-    def handle_ai_reinforcement(self):
-        """Handle reinforcement for AI players"""
-        if self.current_player.reinforcements > 0:
-            # Call AI's reinforcement strategy
-            self.current_player._reinforcement_phase(self.game, self)
-            # Process events during reinforcement
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    return
-            self.render()
-            pygame.time.delay(1000)  # Increased delay for better visibility
-
-    def handle_ai_attack(self):
-        print('formulating attack')
-        self.current_player._attack_phase(self.game, self)
-        # Process events during attack phase
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
+    def show_ai_move(self, delay: int):
+        """Redraw the board and pause so the AI's last move is visible"""
+        pygame.event.get()
         self.render()
-        pygame.time.delay(1000)  # Increased delay for better visibility
-        print('formulating attack done')
+        pygame.time.delay(delay)
 
-    def handle_ai_fortify(self):
-        self.current_player._fortify_phase(self.game, self)
-        # Process events during fortify phase
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-        self.render()
-        pygame.time.delay(1000)  # Increased delay for better visibility
+    def _frame_state(self) -> tuple:
+        """Everything a frame shows: per territory, the HUD text, the buttons and the info panel"""
+        territories = tuple(
+            (t.owner.color if t.owner else None, t.troops,
+             t is self.selected_territory, t is self.target_territory)
+            for t in (self.game.territories[name] for name in self.territory_positions)
+        )
+        player = self.current_player
+        hud = (player.name, player.color, self.phase, player.reinforcements, tuple(c.type for c in player.cards))
+        buttons = (self.button_hovered, self.info_button_hovered)
+        info = tuple((p.name, len(p.territories), len(p.cards)) for p in self.game.players) if self.showing_info else None
+        return territories, hud, buttons, info
 
-    def render(self):
-        # Clear screen with ocean blue background
-        self.screen.fill(self.OCEAN_BLUE)
-        
-        # Draw continent boundaries first
-        self.draw_continent_boundaries()
-        
-        # Draw game elements
-        self.draw_connections()
+    def _dirty_rects(self, state: tuple) -> List[pygame.Rect]:
+        territories, hud, buttons, _ = state
+        drawn_territories, drawn_hud, drawn_buttons, _ = self._drawn
+        dirty = [self._territory_rects[name]
+                 for name, now, before in zip(self.territory_positions, territories, drawn_territories)
+                 if now != before]
+        if hud != drawn_hud:
+            dirty.append(self._hud_text_rect)
+        if buttons != drawn_buttons:
+            dirty.extend((self.button_rect, self.info_button_rect))
+        return dirty
+
+    def _redraw_area(self, area: pygame.Rect):
+        """Repaint one area exactly as a full render would, clipped to it"""
+        self.screen.set_clip(area)
+        self.draw_background(area)
         for territory_name, pos in self.territory_positions.items():
-            self.draw_territory(self.game.territories[territory_name], pos)
+            if self._territory_rects[territory_name].colliderect(area):
+                self.draw_territory(self.game.territories[territory_name], pos)
         self.draw_game_info()
-        
-        # Show player info if active
-        if self.showing_info:
-            self.show_player_info()
-        # else:
-        #     print('showing info')
-        
-        # Update display
-        pygame.display.flip()
+        self.screen.set_clip(None)
+
+    def render(self):
+        if self._background is not None and self._background.get_size() != self.screen.get_size():
+            self._drawn = None  # The window changed size: rebake the background and draw everything
+        state = self._frame_state()
+        if state == self._drawn:
+            return  # Nothing changed since the last frame
+        
+        # The info panel and the popups cover the whole screen, so they and their closing need a full frame
+        if self._drawn is None or self.showing_info or self._drawn[3] is not None:
+            # Ocean, continent boundaries and connections come from the cached background
+            self.draw_background()
+            
+            # Draw game elements
+            for territory_name, pos in self.territory_positions.items():
+                self.draw_territory(self.game.territories[territory_name], pos)
+            self.draw_game_info()
+            
+            # Show player info if active
+            if self.showing_info:
+                self.show_player_info()
+            
+            # Update display
+            pygame.display.flip()
+        else:
+            dirty = self._dirty_rects(state)
+            for area in dirty:
+                self._redraw_area(area)
+            pygame.display.update(dirty)
+        self._drawn = state
+
+    @staticmethod
+    def _is_ai(player: Player) -> bool:
+        # Run as a script, project.py's classes live in __main__ rather than project
+        return isinstance(player, AIPlayer) or type(player).__name__ == 'AIPlayer'
+
+    def end_turn(self):
+        """End the current turn, show its event and start the next player's turn"""
+        event = self.game.end_turn()
+        self.show_event_popup(event)
+        self.current_player = self.game.current_player
+        self.selected_territory = None
+        self.target_territory = None
+        self.game.start_turn()
+        if self._is_ai(self.current_player):
+            # The search starts straight away; its moves are shown once the popup is closed
+            self.ai_turn = AITurn(self.game)
+
+    def step_ai_turn(self):
+        """Apply the AI's next queued move once the previous one has been on screen long enough"""
+        if self.showing_event or pygame.time.get_ticks() < self._ai_resume_at:
+            return
+        item = self.ai_turn.next_action()
+        if item is None:
+            return  # Still searching
+        action, args = item
+        if action in (DONE, FAILED):
+            if action == FAILED:
+                print(f"AI turn of {self.current_player.name} failed: {args[0]!r}")
+            self.ai_turn.finish()
+            self.ai_turn = None
+            self.end_turn()
+            return
+
+        self.game.apply_action(action, args)
+        if action in ('reinforce', 'attack', 'fortify'):
+            self.selected_territory = self.game.territories[args[0]]
+            self.target_territory = self.game.territories[args[1]] if action != 'reinforce' else None
+            self._ai_resume_at = pygame.time.get_ticks() + AI_MOVE_DELAY_MS
 
     def run(self):
         running = True
+        # A loaded game can stop on an AI player's turn
+        if self.ai_turn is None and self._is_ai(self.current_player):
+            self.ai_turn = AITurn(self.game)
         while running:
 
-            for event in pygame.event.get():
+            # Keep the frames coming while an AI turn plays out
+            for event in self.scheduler.wait_events(busy=self.ai_turn is not None):
                 if event.type == pygame.QUIT:
                     running = False
                 
+                # F5 quick-saves; every later action goes to the save's journal
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                    self.game.save_game(savegame.DEFAULT_PATH)
+                
                 # Handle mouse motion for button hover effects
                 if event.type == pygame.MOUSEMOTION:
                     mouse_pos = pygame.mouse.get_pos()
@@ -648,16 +703,19 @@ class RiskGUI:
                     # Handle card trading prompt
                     if self.showing_card_prompt:
                         if self.card_yes_rect.collidepoint(mouse_pos):
-                            reinforcements = self.current_player.trade_cards()
-                            self.current_player.reinforcements += reinforcements
+                            # The AI's worker is searching a copy of the board, so it must not change under it
+                            if self.ai_turn is None:
+                                self.game.trade_cards(self.current_player)
                             self.showing_card_prompt = False
                         elif self.card_no_rect.collidepoint(mouse_pos):
                             self.showing_card_prompt = False
                         continue
                     
-                    # Handle Next Phase button
+                    # Handle Next Phase button (the AI moves on by itself)
                     if self.button_rect.collidepoint(mouse_pos):
-                        if self.phase == "reinforcement":
+                        if self.ai_turn is not None:
+                            pass
+                        elif self.phase == "reinforcement":
                             self.phase = "attack"
                         elif self.phase == "attack":
                             self.phase = "fortify"
@@ -667,75 +725,7 @@ class RiskGUI:
                             if self.current_player.can_trade_cards():
                                 self.showing_card_prompt = True
 
-                            # Show event popup and end turn
-                            # event = random.choice(self.game.events)
-                            # self.show_event_popup(event)
-
-                            event = self.game.end_turn()
-                            self.show_event_popup(event)
-                            
-                            # Update current player after turn ends
-                            self.current_player = self.game.current_player
-                            self.selected_territory = None
-                            self.target_territory = None
-
-                            print(self.current_player.__class__)
-                            print(AIPlayer)
-
-                            print(self.current_player.__class__ is AIPlayer)
-                            # if it's the AI's turn, play out its entire turn in one go
-                            # if isinstance(self.current_player, AIPlayer):
-                            if isinstance(self.current_player, AIPlayer) or 'AIPlayer' in str(self.current_player.__class__):
-                                # Start the AI's turn
-                                self.game.start_turn()
-                                print(' ****************** Ai player')
-                                self.showing_event = False
-                                
-                                # Process AI reinforcement phase
-                                while self.current_player.reinforcements > 0:
-                                    self.handle_ai_reinforcement()
-                                    # Process events and render during AI actions
-                                    for event in pygame.event.get():
-                                        if event.type == pygame.QUIT:
-                                            pygame.quit()
-                                            return
-                                    self.render()
-                                    pygame.time.delay(1000)  # Increased delay for better visibility
-                                
-                                print('reinforcement done')
-                                self.phase = 'attack'
-
-                                # Process AI attack phase
-                                self.handle_ai_attack()
-                                # Process events and render after attack phase
-                                for event in pygame.event.get():
-                                    if event.type == pygame.QUIT:
-                                        pygame.quit()
-                                        return
-                                self.render()
-                                pygame.time.delay(1000)  # Increased delay for better visibility
-                                print('attack done')
-
-                                # Process AI fortify phase
-                                self.phase = 'fortify'
-                                self.handle_ai_fortify()
-                                # Process events and render after fortify phase
-                                for event in pygame.event.get():
-                                    if event.type == pygame.QUIT:
-                                        pygame.quit()
-                                        return
-                                self.render()
-                                pygame.time.delay(1000)  # Increased delay for better visibility
-                                print('fortify done')
-                                self.phase = 'reinforcement'
-
-                                # End AI turn
-                                event = self.game.end_turn()
-                                self.show_event_popup(event)
-                                self.current_player = self.game.current_player
-
-                            else:
-                                print('*********** not ai player', type(self.current_player))
+                            self.end_turn()
 
                     # Check if Player Info button was clicked
                     elif self.info_button_rect.collidepoint(mouse_pos):
@@ -748,7 +738,11 @@ class RiskGUI:
                     else:
                         self.handle_click(mouse_pos)
             
+            if self.ai_turn is not None:
+                self.step_ai_turn()
+            
             if not self.showing_event and not self.showing_card_prompt:
                 self.render()
         
+        print(f"Frame stats: {self.scheduler.summary()}")
         pygame.quit() 
\ No newline at end of file
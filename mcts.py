@@ -0,0 +1,230 @@
+"""Monte Carlo Tree Search (UCT) over the attacks of one turn.
+
+The tree covers the attacks the player can still make this turn.  Decision
+nodes hold the legal attacks plus PASS (end the attack phase), and every
+attack edge branches on the dice outcome of its round, so each child node
+stands for one exact board.  Below the tree a cheap default policy plays
+the rest of the turn and then one more turn for every player, and the final
+board is scored by territory and continent share.
+"""
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import battle_odds
+from compact_state import CompactState, iter_bits
+
+PASS = None  # Action that ends the attack phase
+EXPLORATION = 0.7  # UCT exploration constant, rewards are in [0, 1]
+ROLLOUT_TURNS = 1  # Full rounds of turns the default policy plays after the tree
+MAX_ROLLOUT_ATTACKS = 10  # Dice rounds per turn in a rollout, like AIPlayer._attack_phase
+
+
+class MCTSNode:
+    """A board with the searching player to move"""
+
+    __slots__ = ('visits', 'untried', 'edges')
+
+    def __init__(self):
+        self.visits = 0
+        self.untried = None  # Actions without an edge yet, most promising last
+        self.edges = {}      # action -> MCTSEdge
+
+
+class MCTSEdge:
+    """An attack (or PASS) from a node, with one child per dice outcome"""
+
+    __slots__ = ('visits', 'total', 'children')
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        self.children = {}  # (attacker losses, defender losses) -> MCTSNode
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.visits if self.visits else 0.0
+
+
+class MCTS:
+    """UCT search that keeps its tree between the choose_attack calls of a turn"""
+
+    def __init__(self, exploration: float = EXPLORATION, rollout_turns: int = ROLLOUT_TURNS, rng=random):
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.rng = rng
+        self.iterations = 0
+        self.reused = False  # Whether the last search started from a kept subtree
+        self.reset()
+
+    def __getstate__(self):
+        # The random module cannot be copied or pickled, so it is put back on load
+        state = self.__dict__.copy()
+        if state['rng'] is random:
+            state['rng'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.rng is None:
+            self.rng = random
+
+    def reset(self):
+        """Drop the tree, e.g. at the start of a new turn"""
+        self.root = None
+        self._root_state = None
+        self._root_action = PASS
+
+    def search(self, state: CompactState, time_budget: Optional[float] = None,
+               iteration_limit: Optional[int] = None) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """
+        Run UCT from `state` for the current player until the time budget or
+        iteration limit runs out. Returns (mean reward, action) of the most
+        visited root edge; the action is PASS when ending the phase looks best.
+        """
+        if time_budget is None and iteration_limit is None:
+            raise ValueError("MCTS needs a time budget or an iteration limit")
+        self.root = self._reuse(state)
+        self.reused = self.root is not None
+        if self.root is None:
+            self.root = MCTSNode()
+        player = state.current
+
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.iterations = 0
+        # One iteration always runs so every search has an answer
+        while True:
+            self._iterate(state, player)
+            self.iterations += 1
+            if iteration_limit is not None and self.iterations >= iteration_limit:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        action, edge = max(self.root.edges.items(), key=lambda item: (item[1].visits, item[1].mean))
+        self._root_state = state.copy()
+        self._root_action = action
+        return edge.mean, action
+
+    def _reuse(self, state: CompactState) -> Optional[MCTSNode]:
+        """The subtree for `state` if it follows the last search's move by one dice roll"""
+        if self.root is None or self._root_action is PASS or self._root_state is None:
+            return None
+        if self._root_state.topology is not state.topology or self._root_state.current != state.current:
+            return None
+        edge = self.root.edges.get(self._root_action)
+        if edge is None:
+            return None
+        src, dst = self._root_action
+        for outcome, child in edge.children.items():
+            board = self._root_state.copy()
+            board.apply_attack_result(src, dst, *outcome)
+            if board.hash == state.hash and board.owner == state.owner and board.troops == state.troops:
+                return child
+        return None
+
+    def _iterate(self, root_state: CompactState, player: int):
+        state = root_state.copy()
+        node = self.root
+        path = []  # edges walked, in order
+        in_turn = True
+        while True:
+            node.visits += 1
+            if node.untried is None:
+                node.untried = self._candidate_actions(state, player)
+            if node.untried:
+                action = node.untried.pop()
+                edge = node.edges[action] = MCTSEdge()
+                expanded = True
+            else:
+                action, edge = self._select(node)
+                expanded = False
+            path.append(edge)
+            if action is PASS:
+                in_turn = False
+                break
+
+            src, dst = action
+            outcome = state.roll_losses(src, dst, self.rng)
+            state.apply_attack_result(src, dst, *outcome)
+            child = edge.children.get(outcome)
+            if child is None:
+                child = edge.children[outcome] = MCTSNode()
+            node = child
+            if expanded:
+                break
+
+        reward = self._rollout(state, player, in_turn)
+        for edge in path:
+            edge.visits += 1
+            edge.total += reward
+
+    def _select(self, node: MCTSNode) -> Tuple[Optional[Tuple[int, int]], MCTSEdge]:
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        return max(node.edges.items(),
+                   key=lambda item: item[1].mean + exploration * math.sqrt(log_visits / item[1].visits))
+
+    def _candidate_actions(self, state: CompactState, player: int) -> List[Optional[Tuple[int, int]]]:
+        """Attacks ordered by win probability, most promising last, with PASS first"""
+        troops = state.troops
+        actions = state.attack_actions(player)
+        actions.sort(key=lambda a: battle_odds.win_probability(troops[a[0]], troops[a[1]]))
+        return [PASS] + actions
+
+    def _rollout(self, state: CompactState, player: int, in_turn: bool) -> float:
+        """Finish the turn and play `rollout_turns` more rounds with the default policy"""
+        if in_turn:
+            self._play_turn(state, player)
+        num_players = len(state.attacks_lost)
+        mover = player
+        for _ in range(self.rollout_turns * num_players):
+            mover = state.next_player(mover)
+            if state.territory_count(player) in (0, len(state.owner)):
+                break
+            if state.territory_count(mover) == 0:
+                continue
+            self._reinforce(state, mover)
+            self._play_turn(state, mover)
+        return self._reward(state, player)
+
+    def _reinforce(self, state: CompactState, player: int):
+        """Place the turn's reinforcements on one random border territory"""
+        topology = state.topology
+        reinforcements = max(3, state.territory_count(player) // 3)
+        for continent, bonus in enumerate(topology.continent_bonus):
+            if state.owns_continent(player, continent):
+                reinforcements += bonus
+        border = list(iter_bits(state.border_mask(player)))
+        if border:
+            # Rollout boards are throwaway copies, so the hash is not kept up to date
+            state.troops[self.rng.choice(border)] += reinforcements
+
+    def _play_turn(self, state: CompactState, player: int):
+        """Default policy: keep attacking random favourable targets until out of dice rounds"""
+        troops = state.troops
+        rounds = 0
+        while rounds < MAX_ROLLOUT_ATTACKS:
+            favourable = [(src, dst) for src, dst in state.attack_actions(player) if troops[src] > troops[dst] + 1]
+            if not favourable:
+                return
+            src, dst = self.rng.choice(favourable)
+            # Press the same attack while it stays favourable
+            while rounds < MAX_ROLLOUT_ATTACKS and troops[src] > troops[dst] + 1:
+                rounds += 1
+                if state.simulate_attack(src, dst, self.rng):
+                    break
+
+    def _reward(self, state: CompactState, player: int) -> float:
+        """Share of territories plus continent bonuses held by `player`, in [0, 1]"""
+        topology = state.topology
+        bonus = sum(b for continent, b in enumerate(topology.continent_bonus)
+                    if state.owns_continent(player, continent))
+        return (state.territory_count(player) + bonus) / (len(topology) + sum(topology.continent_bonus))
+
+    def root_statistics(self) -> Dict[Optional[Tuple[int, int]], Tuple[int, float]]:
+        """(visits, mean reward) of every root edge"""
+        if self.root is None:
+            return {}
+        return {action: (edge.visits, edge.mean) for action, edge in self.root.edges.items()}
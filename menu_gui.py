@@ -1,10 +1,22 @@
+import os
 import pygame
 import sys
+
+import savegame
+from frame_scheduler import FrameScheduler, DEFAULT_FPS
 # from typing import Dict, Any, Optional, Tuple
 
+# AIPlayer search types in the order the AI Strategies menu cycles through them
+AI_STRATEGY_LABELS = {
+    'alphabeta': 'Alpha-Beta',
+    'expectiminimax': 'Expectiminimax',
+    'mcts': 'MCTS'
+}
+
 class MenuGUI:
-    def __init__(self):
+    def __init__(self, fps: int = DEFAULT_FPS):
         pygame.init()
+        self.scheduler = FrameScheduler(fps)
         self.screen_width = 800
         self.screen_height = 600
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
@@ -28,11 +40,12 @@ class MenuGUI:
             'ai_players': 1,
             'max_cards': 5,
             'random_events': True,
-            'victory_condition': 'elimination'
+            'victory_condition': 'elimination',
+            'ai_strategies': ['alphabeta']  # One search type per AI player
         }
         
         # Menu state
-        self.current_menu = 'main'  # main, settings, load
+        self.current_menu = 'main'  # main, settings, ai_strategies, load
         self.selected_option = 0
         self.button_rects = []
         
@@ -86,6 +99,16 @@ class MenuGUI:
             self.selected_option == 1
         ))
         
+        # Load Game button, for the quick save (F5 in game)
+        self.button_rects.append(self.draw_button(
+            "Load Game",
+            self.screen_width//2 - button_width//2,
+            start_y + (button_height + spacing) * 2,
+            button_width,
+            button_height,
+            self.selected_option == 2
+        ))
+        
         # Quit button
         self.button_rects.append(self.draw_button(
             "Quit",
@@ -142,15 +165,69 @@ class MenuGUI:
             self.selected_option == 2
         ))
         
-        # Back button
+        # AI Strategies submenu
         self.button_rects.append(self.draw_button(
-            "Back",
+            "AI Strategies",
             self.screen_width//2 - button_width//2,
             start_y + (button_height + spacing) * 3,
             button_width,
             button_height,
             self.selected_option == 3
         ))
+        
+        # Back button
+        self.button_rects.append(self.draw_button(
+            "Back",
+            self.screen_width//2 - button_width//2,
+            start_y + (button_height + spacing) * 4,
+            button_width,
+            button_height,
+            self.selected_option == 4
+        ))
+    
+    def draw_ai_strategies_menu(self):
+        self.screen.fill(self.BLACK)
+        
+        # Draw title
+        title = self.title_font.render("AI Strategies", True, self.WHITE)
+        title_rect = title.get_rect(center=(self.screen_width//2, 80))
+        self.screen.blit(title, title_rect)
+        
+        # One button per AI player, fitted for up to five of them plus Back
+        button_width = 360
+        button_height = 50
+        spacing = 15
+        start_y = 140
+        
+        self.button_rects = []
+        
+        strategies = self.settings['ai_strategies']
+        for i, strategy in enumerate(strategies):
+            self.button_rects.append(self.draw_button(
+                f"AI Player {i+1}: {AI_STRATEGY_LABELS[strategy]}",
+                self.screen_width//2 - button_width//2,
+                start_y + (button_height + spacing) * i,
+                button_width,
+                button_height,
+                self.selected_option == i
+            ))
+        
+        # Back button
+        self.button_rects.append(self.draw_button(
+            "Back",
+            self.screen_width//2 - button_width//2,
+            start_y + (button_height + spacing) * len(strategies),
+            button_width,
+            button_height,
+            self.selected_option == len(strategies)
+        ))
+    
+    def _sync_ai_strategies(self):
+        """Keep one strategy per AI player after the player counts change"""
+        strategies = self.settings['ai_strategies']
+        num_ai = self.settings['ai_players']
+        del strategies[num_ai:]
+        strategies.extend(['alphabeta'] * (num_ai - len(strategies)))
     
     def handle_click(self, pos):
         for i, rect in enumerate(self.button_rects):
@@ -162,7 +239,11 @@ class MenuGUI:
                     elif i == 1:  # Settings
                         self.current_menu = 'settings'
                         self.selected_option = 0
-                    elif i == 2:  # Quit game
+                    elif i == 2:  # Load Game
+                        if os.path.exists(savegame.DEFAULT_PATH):
+                            return dict(self.settings, load_game=savegame.DEFAULT_PATH)
+                        print(f"No saved game at {savegame.DEFAULT_PATH}")
+                    elif i == 3:  # Quit game
                         return None
                 elif self.current_menu == 'settings':
                     if i == 0:  # Number of Players
@@ -171,23 +252,41 @@ class MenuGUI:
                         self.settings['ai_players'] = (self.settings['ai_players'] % self.settings['num_players']) + 1
                     elif i == 2:  # Random Events
                         self.settings['random_events'] = not self.settings['random_events']
-                    elif i == 3:  # Back
+                    elif i == 3:  # AI Strategies
+                        self._sync_ai_strategies()
+                        self.current_menu = 'ai_strategies'
+                        self.selected_option = 0
+                    elif i == 4:  # Back
                         self.current_menu = 'main'
                         self.selected_option = 0
+                    self._sync_ai_strategies()
+                elif self.current_menu == 'ai_strategies':
+                    strategies = self.settings['ai_strategies']
+                    if i < len(strategies):  # Cycle this AI player's strategy
+                        names = list(AI_STRATEGY_LABELS)
+                        strategies[i] = names[(names.index(strategies[i]) + 1) % len(names)]
+                    else:  # Back
+                        self.current_menu = 'settings'
+                        self.selected_option = 3
                 break
     
     def run(self):
         running = True
+        dirty = True  # The menu is only redrawn after an event that can change it
         while running:
-            for event in pygame.event.get():
+            for event in self.scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
+                elif event.type == pygame.VIDEOEXPOSE:
+                    dirty = True
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # Left click
+                        dirty = True
                         result = self.handle_click(event.pos)
                         if result is not None:
                             return result
                 elif event.type == pygame.KEYDOWN:
+                    dirty = True
                     if event.key == pygame.K_UP:
                         self.selected_option = (self.selected_option - 1) % len(self.button_rects)
                     elif event.key == pygame.K_DOWN:
@@ -197,19 +296,28 @@ class MenuGUI:
                         if result is not None:
                             return result
                     elif event.key == pygame.K_ESCAPE:
-                        if self.current_menu != 'main':
+                        if self.current_menu == 'ai_strategies':
+                            self.current_menu = 'settings'
+                            self.selected_option = 3
+                        elif self.current_menu != 'main':
                             self.current_menu = 'main'
                             self.selected_option = 0
                         else:
                             return None
             
+            if not dirty:
+                continue  # Woken by the idle timeout or an event that changes nothing
+            
             # Draw current menu
             if self.current_menu == 'main':
                 self.draw_main_menu()
             elif self.current_menu == 'settings':
                 self.draw_settings_menu()
+            elif self.current_menu == 'ai_strategies':
+                self.draw_ai_strategies_menu()
             
             pygame.display.flip()
+            dirty = False
         
         pygame.quit()
         return None 
\ No newline at end of file
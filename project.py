@@ -1,16 +1,32 @@
 import random
 import numpy as np
-import pygame
 import networkx as nx
 from typing import List, Dict, Tuple, Optional
-import json
-import pickle
 from datetime import datetime
-import copy
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import battle_odds
+import savegame
+from game_rng import GameRNG
+from compact_state import CompactState
+from mcts import MCTS
+from search import (TranspositionTable, MoveOrdering, SearchStats, SearchTimeout, SIDE_KEYS,
+                    EXACT, LOWER_BOUND, UPPER_BOUND)
 
 
 sampleAiPlayer = None
 
+PLAYER_COLORS = [
+    (255, 0, 0),    # Red
+    (0, 0, 255),    # Blue
+    (0, 255, 0),    # Green
+    (255, 255, 0),  # Yellow
+    (255, 0, 255),  # Magenta
+    (0, 255, 255)   # Cyan
+]
+
 class Territory:
     def __init__(self, name: str, continent: str):
         self.name = name
@@ -19,6 +35,36 @@ class Territory:
         self.troops = 0
         self.connections = []
 
+class TerritorySet:
+    """A player's territories in the order they were gained, with O(1) add,
+    remove and lookup by name. RiskGame.transfer_territory is the only writer."""
+
+    def __init__(self, territories=()):
+        self._by_name = {}
+        for territory in territories:
+            self.add(territory)
+
+    def add(self, territory: Territory):
+        self._by_name[territory.name] = territory
+
+    def remove(self, territory: Territory):
+        del self._by_name[territory.name]
+
+    def has_name(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __contains__(self, territory: Territory) -> bool:
+        return self._by_name.get(territory.name) is territory
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __repr__(self) -> str:
+        return f"TerritorySet({list(self._by_name)})"
+
 class Card:
     def __init__(self, territory: str, type: str):
         self.territory = territory
@@ -28,7 +74,7 @@ class Player:
     def __init__(self, name: str, color: Tuple[int, int, int]):
         self.name = name
         self.color = color
-        self.territories = []
+        self.territories = TerritorySet()
         self.cards = []
         self.num_cards = 0
         self.num_reinforcements = 0
@@ -75,7 +121,7 @@ class Player:
         # Check for territory matching bonus
         territory_bonus = 0
         for card in self.cards[:3]:  # Only check first 3 cards being traded
-            if card.territory != "wild" and any(t.name == card.territory for t in self.territories):
+            if card.territory != "wild" and self.territories.has_name(card.territory):
                 territory_bonus += 2
         
         total_reinforcements = base_reinforcements + territory_bonus
@@ -127,7 +173,9 @@ class RandomEvent:
         self.chosen_values = {}  # Store random values chosen for this event
 
 class RiskGame:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        # Dice, deal, deck and events all come from this stream, never the random module
+        self.rng = GameRNG(seed)
         self.territories = {}
         self.players = []
         self.current_player = None
@@ -141,8 +189,103 @@ class RiskGame:
             "Asia": 7,
             "Australia": 2
         }
+        self.continent_sizes = {}  # continent -> number of territories
+        self.continent_counts = {}  # player -> {continent: territories owned}, kept by transfer_territory
+        # Bitboards, bit i = i-th territory in self.territories; built once the map is connected
+        self.territory_bits = {}  # name -> bit
+        self.neighbor_masks = {}  # name -> neighbours
+        self.continent_masks = {}  # continent -> members
+        self.owner_masks = {}  # player -> owned territories, kept by transfer_territory
         self.card_deck = self._initialize_card_deck()
         self.game_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.verbose = True  # Headless simulations switch the console log off
+        self.turn = 0
+        self.phase = 'reinforcement'  # reinforcement, attack or fortify
+        # Called as listener(action, args) after every state change, e.g. the save game journal
+        self.action_listeners = []
+        self._journal = None
+        self._current_event = None
+
+    def __getstate__(self):
+        # Copies (e.g. for a search) leave the journal behind so they never write to it
+        state = self.__dict__.copy()
+        state['action_listeners'] = []
+        state['_journal'] = None
+        return state
+
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def _record(self, action: str, *args):
+        for listener in self.action_listeners:
+            listener(action, args)
+
+    def apply_action(self, action: str, args: tuple):
+        """Redo an action as _record reported it, with its recorded dice and event picks"""
+        territories = self.territories
+        if action == 'start_turn':
+            self.start_turn()
+        elif action == 'reinforce':
+            self.reinforce(territories[args[0]], args[1])
+        elif action == 'attack':
+            self.attack(territories[args[0]], territories[args[1]], (args[2], args[3]))
+        elif action == 'fortify':
+            self.fortify(territories[args[0]], territories[args[1]], args[2])
+        elif action == 'trade_cards':
+            self.trade_cards(self.players[args[0]])
+        elif action == 'end_turn':
+            self.end_turn(args[0], args[1])
+        elif action == 'phase':
+            self.set_phase(args[0])
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+    def save_game(self, path: str):
+        """Write a snapshot to `path`; every later action is journaled next to it"""
+        snapshot = savegame.encode_snapshot(self)
+        savegame.write_atomic(path, snapshot)
+        self._attach_journal(savegame.Journal(savegame.journal_path(path), snapshot, self))
+        self._log(f"Game saved to {path}")
+
+    def load_game(self, path: str) -> bool:
+        """Restore the snapshot at `path` and replay its journal; False if it cannot be loaded"""
+        try:
+            with open(path, 'rb') as f:
+                snapshot = f.read()
+            state = savegame.decode_snapshot(snapshot)
+            records = savegame.read_journal(savegame.journal_path(path), snapshot)
+            savegame.restore_snapshot(self, state, self.player_from_save, Card)
+        except (OSError, ValueError) as e:
+            print(f"Could not load {path}: {e}")
+            return False
+
+        self._attach_journal(None)
+        verbose, self.verbose = self.verbose, False
+        try:
+            for action, payload in records:
+                savegame.replay(self, action, payload)
+        finally:
+            self.verbose = verbose
+        # Keep appending to the same journal; its snapshot has not changed
+        self._attach_journal(savegame.Journal(savegame.journal_path(path), snapshot, self, append=True))
+        actions = sum(action not in ('rng', 'search_rng') for action, _ in records)
+        self._log(f"Loaded {path}: turn {self.turn}, {actions} journaled actions replayed")
+        return True
+
+    def _attach_journal(self, journal):
+        if self._journal is not None:
+            self.action_listeners.remove(self._journal)
+            self._journal.close()
+        self._journal = journal
+        if journal is not None:
+            self.action_listeners.append(journal)
+
+    @staticmethod
+    def player_from_save(name: str, color: Tuple[int, int, int], ai_config: Optional[dict]) -> Player:
+        if ai_config is None:
+            return Player(name, color)
+        return AIPlayer.from_save_config(name, color, ai_config)
         
     def _initialize_events(self) -> List[RandomEvent]:
         events = [
@@ -189,55 +332,61 @@ class RiskGame:
         ]
         return events
 
+    def _event_choice(self, key: str, choose: callable):
+        """Random pick of the running event, stored in its chosen_values; a replayed event brings its own"""
+        values = self._current_event.chosen_values
+        if key not in values:
+            values[key] = choose()
+        return values[key]
+
     def _natural_disaster_effect(self, player: Player):
-        continent = random.choice(list(set(t.continent for t in self.territories.values())))
-        self.events[-1].chosen_values['continent'] = continent
-        for territory in self.territories.values():
-            if territory.continent == continent and territory.owner == player:
+        continent = self._event_choice(
+            'continent', lambda: self.rng.choice(list(self.continent_sizes))
+        )
+        for territory in player.territories:
+            if territory.continent == continent:
                 territory.troops = max(0, territory.troops - 1)
 
     def _reinforcement_effect(self, player: Player):
-        player_territories = [t for t in self.territories.values() if t.owner == player]
+        player_territories = list(player.territories)
         if player_territories:
-            territory = random.choice(player_territories)
-            self.events[-1].chosen_values['territory'] = territory.name
-            territory.troops += 2
+            name = self._event_choice('territory', lambda: self.rng.choice(player_territories).name)
+            self.territories[name].troops += 2
 
     def _disease_effect(self, player: Player):
-        for territory in self.territories.values():
-            if territory.owner == player and territory.troops > 3:
+        for territory in player.territories:
+            if territory.troops > 3:
                 territory.troops -= 1
 
     def _territory_swap_effect(self, player: Player):
         # Get two random territories
         territories = list(self.territories.values())
         if len(territories) >= 2:
-            territory1, territory2 = random.sample(territories, 2)
+            names = self._event_choice('territories', lambda: [t.name for t in self.rng.sample(territories, 2)])
+            territory1, territory2 = (self.territories[name] for name in names)
             # Swap owners
             owner1 = territory1.owner
             owner2 = territory2.owner
             if owner1 and owner2:
-                territory1.owner.territories.remove(territory1)
-                territory2.owner.territories.remove(territory2)
-                territory1.owner = owner2
-                territory2.owner = owner1
-                owner2.territories.append(territory1)
-                owner1.territories.append(territory2)
+                self.transfer_territory(territory1, owner2)
+                self.transfer_territory(territory2, owner1)
 
     def _border_dispute_effect(self, player: Player):
         # Find two random connected territories
         territories = list(self.territories.values())
         if len(territories) >= 2:
-            territory1 = random.choice(territories)
-            connected = [t for t in territories if t.name in territory1.connections]
-            if connected:
-                territory2 = random.choice(connected)
-                territory1.troops = max(0, territory1.troops - 1)
-                territory2.troops = max(0, territory2.troops - 1)
+            def choose():
+                territory1 = self.rng.choice(territories)
+                connected = [t for t in territories if t.name in territory1.connections]
+                return [territory1.name, self.rng.choice(connected).name] if connected else []
+            names = self._event_choice('territories', choose)
+            for name in names:
+                territory = self.territories[name]
+                territory.troops = max(0, territory.troops - 1)
 
     def _alliance_effect(self, player: Player):
         # Choose a random continent
-        continent = random.choice(list(set(t.continent for t in self.territories.values())))
+        continent = self._event_choice('continent', lambda: self.rng.choice(list(self.continent_sizes)))
         # Add 1 troop to all territories in that continent
         for territory in self.territories.values():
             if territory.continent == continent:
@@ -254,11 +403,15 @@ class RiskGame:
         for territory in self.territories.values():
             territory.troops += 1
 
-    def trigger_random_event(self):
-        event = random.choice(self.events)
-        print(f"\nRandom Event: {event.name}")
-        print(f"Description: {event.description}")
+    def trigger_random_event(self, event_index: Optional[int] = None, choices: Optional[dict] = None):
+        """Run a random event, or event `event_index` with the given choices when replaying one"""
+        event = self.rng.choice(self.events) if event_index is None else self.events[event_index]
+        event.chosen_values = dict(choices) if choices else {}
+        self._current_event = event
+        self._log(f"\nRandom Event: {event.name}")
+        self._log(f"Description: {event.description}")
         event.effect(self.current_player)
+        self._current_event = None
 
         return event
         
@@ -278,9 +431,24 @@ class RiskGame:
             for territory_name in territories:
                 self.territories[territory_name] = Territory(territory_name, continent)
                 self.game_map.add_node(territory_name)
+            self.continent_sizes[continent] = len(territories)
 
         # Add complete territory connections
         self._add_territory_connections()
+        self._build_masks()
+
+    def _build_masks(self):
+        self.territory_bits = {name: 1 << i for i, name in enumerate(self.territories)}
+        self.neighbor_masks = {}
+        self.continent_masks = {}
+        for territory in self.territories.values():
+            mask = 0
+            for connection in territory.connections:
+                mask |= self.territory_bits[connection]
+            self.neighbor_masks[territory.name] = mask
+            self.continent_masks[territory.continent] = (
+                self.continent_masks.get(territory.continent, 0) | self.territory_bits[territory.name]
+            )
 
     def _add_territory_connections(self):
         # North America connections
@@ -351,20 +519,18 @@ class RiskGame:
         # Continent bonus
         continent_bonus = 0
         for continent, bonus in self.continent_bonus.items():
-            # Check if player owns all territories in this continent
-            continent_territories = [t for t in self.territories.values() if t.continent == continent]
-            if all(t.owner == player for t in continent_territories):
+            if self.owns_continent(player, continent):
                 continent_bonus += bonus
 
         total_reinforcements = base + continent_bonus
-        print(f"Calculating reinforcements for {player.name}:")
-        print(f"Base reinforcements (territories/3): {base}")
-        print(f"Continent bonus: {continent_bonus}")
-        print(f"Total reinforcements: {total_reinforcements}")
+        self._log(f"Calculating reinforcements for {player.name}:")
+        self._log(f"Base reinforcements (territories/3): {base}")
+        self._log(f"Continent bonus: {continent_bonus}")
+        self._log(f"Total reinforcements: {total_reinforcements}")
         return total_reinforcements
 
     def roll_dice(self, num_dice: int) -> List[int]:
-        return sorted([random.randint(1, 6) for _ in range(num_dice)], reverse=True)
+        return self.rng.roll_dice(num_dice)
 
     def resolve_combat(self, attacker: Territory, defender: Territory) -> Tuple[int, int]:
         # Determine number of dice
@@ -387,7 +553,9 @@ class RiskGame:
 
         return attacker_losses, defender_losses
 
-    def attack(self, attacker: Territory, defender: Territory) -> bool:
+    def attack(self, attacker: Territory, defender: Territory,
+               losses: Optional[Tuple[int, int]] = None) -> bool:
+        """One round of dice; `losses` replays a recorded (attacker, defender) result instead of rolling"""
         if attacker.owner.name != self.current_player.name:
             raise ValueError("Not your territory")
         if defender.owner.name == self.current_player.name:
@@ -397,7 +565,8 @@ class RiskGame:
         if attacker.troops < 2:
             raise ValueError("Not enough troops to attack")
 
-        attacker_losses, defender_losses = self.resolve_combat(attacker, defender)
+        attacker_losses, defender_losses = self.resolve_combat(attacker, defender) if losses is None else losses
+        self._record('attack', attacker.name, defender.name, attacker_losses, defender_losses)
         
         # Apply losses
         attacker.troops -= attacker_losses
@@ -412,28 +581,68 @@ class RiskGame:
             self.current_player.battle_stats['attacks_lost'] += 1
             defender.owner.battle_stats['attacks_won'] += 1
 
-        # If defender is defeated, transfer ownership
+        # If defender is defeated, transfer ownership (continent control is updated with it)
         if defender.troops <= 0:
-            defender.owner.territories.remove(defender)
-            defender.owner = attacker.owner
-            defender.owner.territories.append(defender)
+            self.transfer_territory(defender, attacker.owner)
             defender.troops = attacker.troops - 1
             attacker.troops = 1
             
-            # Update continent control statistics
-            self._update_continent_control()
-            
             return True
 
         return False
 
+    def owned_in_continent(self, player: Player, continent: str) -> int:
+        counts = self.continent_counts.get(player)
+        return counts.get(continent, 0) if counts else 0
+
+    def owns_continent(self, player: Player, continent: str) -> bool:
+        return self.owned_in_continent(player, continent) == self.continent_sizes.get(continent, -1)
+
+    def adjacent_mask(self, player: Player) -> int:
+        """Bitboard of every territory next to one of `player`'s"""
+        mask = 0
+        for territory in player.territories:
+            mask |= self.neighbor_masks[territory.name]
+        return mask
+
+    def transfer_territory(self, territory: Territory, new_owner: Player):
+        """Give `territory` to `new_owner`, keeping the continent counters and bitboards in step"""
+        continent = territory.continent
+        size = self.continent_sizes.get(continent, -1)
+        bit = self.territory_bits.get(territory.name, 0)
+        old_owner = territory.owner
+        if old_owner is not None:
+            old_owner.territories.remove(territory)
+            self.owner_masks[old_owner] &= ~bit
+            counts = self.continent_counts[old_owner]
+            if counts[continent] == size and continent in self.continent_bonus:
+                old_owner.battle_stats['continents_controlled'] -= 1
+            counts[continent] -= 1
+
+        territory.owner = new_owner
+        if new_owner is not None:
+            new_owner.territories.add(territory)
+            self.owner_masks[new_owner] = self.owner_masks.get(new_owner, 0) | bit
+            counts = self.continent_counts.setdefault(new_owner, {})
+            counts[continent] = counts.get(continent, 0) + 1
+            if counts[continent] == size and continent in self.continent_bonus:
+                new_owner.battle_stats['continents_controlled'] += 1
+
     def _update_continent_control(self):
+        """Recount the continent counters from scratch, for owners written without transfer_territory"""
+        self.continent_counts = {player: {} for player in self.players}
+        self.owner_masks = {player: 0 for player in self.players}
+        for territory in self.territories.values():
+            if territory.owner is not None:
+                counts = self.continent_counts.setdefault(territory.owner, {})
+                counts[territory.continent] = counts.get(territory.continent, 0) + 1
+                self.owner_masks[territory.owner] = (
+                    self.owner_masks.get(territory.owner, 0) | self.territory_bits.get(territory.name, 0)
+                )
         for player in self.players:
-            player.battle_stats['continents_controlled'] = 0
-            for continent in self.continent_bonus.keys():
-                continent_territories = [t for t in self.territories.values() if t.continent == continent]
-                if all(t.owner == player for t in continent_territories):
-                    player.battle_stats['continents_controlled'] += 1
+            player.battle_stats['continents_controlled'] = sum(
+                1 for continent in self.continent_bonus if self.owns_continent(player, continent)
+            )
 
     def fortify(self, from_territory: Territory, to_territory: Territory, num_troops: int):
         if from_territory.owner != self.current_player or to_territory.owner != self.current_player:
@@ -445,15 +654,30 @@ class RiskGame:
 
         from_territory.troops -= num_troops
         to_territory.troops += num_troops
+        self._record('fortify', from_territory.name, to_territory.name, num_troops)
 
-    def reinforce(self, territory: Territory):
+    def reinforce(self, territory: Territory, num_troops: int = 1):
         if territory.owner != self.current_player:
             raise ValueError("Not your territory")
 
-        territory.troops += 1
-        self.current_player.reinforcements -= 1
+        territory.troops += num_troops
+        self.current_player.reinforcements -= num_troops
+        self._record('reinforce', territory.name, num_troops)
+
+    def trade_cards(self, player: Player) -> int:
+        """Trade a card set of `player` and add the reinforcements it is worth"""
+        reinforcements = player.trade_cards()
+        player.reinforcements += reinforcements
+        self._record('trade_cards', self.players.index(player))
+        return reinforcements
+
+    def set_phase(self, phase: str):
+        self.phase = phase
+        self._record('phase', phase)
 
     def start_turn(self):
+        self.phase = 'reinforcement'
+        self._record('start_turn')
         # Calculate reinforcements for the current player
         self.current_player.reinforcements = self.calculate_reinforcements(self.current_player)
         
@@ -461,15 +685,18 @@ class RiskGame:
         if self.card_deck:
             card = self.card_deck.pop()
             self.current_player.add_card(card)
-            print(f"{self.current_player.name} drew a {card.type} card for territory {card.territory}")
+            self._log(f"{self.current_player.name} drew a {card.type} card for territory {card.territory}")
         
-        print(f"\n{self.current_player.name}'s turn")
-        print(f"Available reinforcements: {self.current_player.reinforcements}")
-        print(f"Cards: {[card.type for card in self.current_player.cards]}")
+        self._log(f"\n{self.current_player.name}'s turn")
+        self._log(f"Available reinforcements: {self.current_player.reinforcements}")
+        self._log(f"Cards: {[card.type for card in self.current_player.cards]}")
 
-    def end_turn(self):
+    def end_turn(self, event_index: Optional[int] = None, choices: Optional[dict] = None):
+        """Trigger the end-of-turn event (a replay passes the recorded one) and pass the turn on"""
         # Trigger random event
-        event = self.trigger_random_event()
+        event = self.trigger_random_event(event_index, choices)
+        self.turn += 1
+        self._record('end_turn', self.events.index(event), event.chosen_values)
         
         # Move to next player
         current_index = -1
@@ -483,9 +710,14 @@ class RiskGame:
             raise Exception('No player found for next turn')
         
         next_index = (current_index + 1) % len(self.players)
+        # Players without territories are out of the game and lose their turns
+        for _ in range(len(self.players)):
+            if self.players[next_index].territories:
+                break
+            next_index = (next_index + 1) % len(self.players)
         self.current_player = self.players[next_index]
         
-        print('the next player is ', self.current_player.name, self.current_player.__class__ , 'among ')
+        self._log('the next player is ', self.current_player.name, self.current_player.__class__ , 'among ')
         # for player in self.players:
         #     print('player: ', player.name, type(player), end='')
         # print()
@@ -496,15 +728,17 @@ class RiskGame:
         active_players = [p for p in self.players if len(p.territories) > 0]
         if len(active_players) == 1:
             winner = active_players[0]
-            print(f"\n{winner.name} has won the game!")
-            self._print_game_statistics(winner)
+            self._log(f"\n{winner.name} has won the game!")
+            if self.verbose:
+                self._print_game_statistics(winner)
             return True
             
         # Check if any player controls all territories
         for player in self.players:
             if len(player.territories) == len(self.territories):
-                print(f"\n{player.name} has won by controlling all territories!")
-                self._print_game_statistics(player)
+                self._log(f"\n{player.name} has won by controlling all territories!")
+                if self.verbose:
+                    self._print_game_statistics(player)
                 return True
                 
         return False
@@ -532,8 +766,7 @@ class RiskGame:
             print("\nYou can trade cards for reinforcements!")
             print("Your cards:", [card.type for card in self.current_player.cards])
             if input("Would you like to trade cards? (y/n): ").lower() == 'y':
-                reinforcements = self.current_player.trade_cards()
-                self.current_player.reinforcements += reinforcements
+                reinforcements = self.trade_cards(self.current_player)
                 print(f"Received {reinforcements} reinforcements from card trade")
         
         while self.current_player.reinforcements > 0:
@@ -561,6 +794,7 @@ class RiskGame:
                 print("Invalid territory name")
         
         # Attack phase
+        self.set_phase('attack')
         print("\nAttack Phase")
         while True:
             print("\nYour territories:")
@@ -601,6 +835,7 @@ class RiskGame:
                 print("Invalid territory name")
         
         # Fortify phase
+        self.set_phase('fortify')
         print("\nFortify Phase")
         while True:
             print("\nYour territories:")
@@ -653,17 +888,16 @@ class RiskGame:
         
         # Get all territories and shuffle them
         territories = list(self.territories.values())
-        random.shuffle(territories)
+        self.rng.shuffle(territories)
         
         # Initial territory distribution
-        print("\nInitial Territory Distribution Phase")
+        self._log("\nInitial Territory Distribution Phase")
         current_player_idx = 0
         for territory in territories:
             player = self.players[current_player_idx]
-            territory.owner = player
+            self.transfer_territory(territory, player)
             territory.troops = 1  # Start with 1 troop each
-            player.territories.append(territory)
-            print(f"{player.name} claims {territory.name}")
+            self._log(f"{player.name} claims {territory.name}")
             
             # Move to next player
             current_player_idx = (current_player_idx + 1) % len(self.players)
@@ -674,15 +908,15 @@ class RiskGame:
         # Randomly distribute remaining troops for each player
         for player in self.players:
             remaining_troops = troops_per_player
-            player_territories = player.territories.copy()
-            random.shuffle(player_territories)
+            player_territories = list(player.territories)
+            self.rng.shuffle(player_territories)
             
             # Distribute troops randomly
             while remaining_troops > 0 and player_territories:
                 # Choose a random territory
-                territory = random.choice(player_territories)
+                territory = self.rng.choice(player_territories)
                 # Add 1-3 troops randomly
-                troops_to_add = min(random.randint(1, 3), remaining_troops)
+                troops_to_add = min(self.rng.randint(1, 3), remaining_troops)
                 territory.troops += troops_to_add
                 remaining_troops -= troops_to_add
                 
@@ -690,13 +924,18 @@ class RiskGame:
                 if remaining_troops == 0:
                     player_territories.remove(territory)
             
-            print(f"{player.name} has {troops_per_player} troops distributed across their territories")
+            self._log(f"{player.name} has {troops_per_player} troops distributed across their territories")
             for territory in player.territories:
-                print(f"  {territory.name}: {territory.troops} troops")
+                self._log(f"  {territory.name}: {territory.troops} troops")
             
             # Initialize reinforcements for the first turn
             player.reinforcements = self.calculate_reinforcements(player)
-            print(f"{player.name} starts with {player.reinforcements} reinforcements for their first turn")
+            self._log(f"{player.name} starts with {player.reinforcements} reinforcements for their first turn")
+
+        # AI searches get streams of their own, so their sampling never moves the game's dice
+        for player in self.players:
+            if isinstance(player, AIPlayer):
+                player.rng.seed(self.rng.spawn_seed())
 
     def _initialize_card_deck(self) -> List[Card]:
         deck = []
@@ -718,25 +957,100 @@ class RiskGame:
         for _ in range(2):
             deck.append(Card("wild", "wild"))
         
-        random.shuffle(deck)
+        self.rng.shuffle(deck)
         return deck
     
     def draw_card(self, player: Player):
         if self.card_deck:
             card = self.card_deck.pop()
             player.cards.append(card)
-            print(f"DEBUG: {player.name} drew a {card.type} card for territory {card.territory}")
+            self._log(f"DEBUG: {player.name} drew a {card.type} card for territory {card.territory}")
             return card
         return None
         
+SEARCH_TYPES = ('alphabeta', 'expectiminimax', 'mcts')
+MAX_ITERATIVE_DEPTH = 32  # Cap for iterative deepening under a time or node budget
+MCTS_TIME_BUDGET = 1.0  # Seconds per choose_attack for MCTS players without a budget of their own
+# Workers prune against the shared alpha minus this margin, so every move that can
+# tie the best one still gets an exact value and the merge does not depend on timing
+PARALLEL_ALPHA_MARGIN = 1e-9
+
+# Root-parallel search: one process pool per worker count, created on first use
+_search_pools = {}
+# Set in each pool worker by _init_search_worker
+_worker_shared_alpha = None
+_worker_players = {}
+
+
+def _search_pool(workers: int):
+    """Return the (executor, shared alpha) pair for `workers` processes"""
+    pool = _search_pools.get(workers)
+    if pool is None:
+        shared_alpha = multiprocessing.Value('d', float('-inf'))
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                                       initargs=(shared_alpha,))
+        pool = _search_pools[workers] = (executor, shared_alpha)
+    return pool
+
+
+def shutdown_search_pools():
+    for executor, _ in _search_pools.values():
+        executor.shutdown()
+    _search_pools.clear()
+
+
+def _init_search_worker(shared_alpha):
+    global _worker_shared_alpha
+    _worker_shared_alpha = shared_alpha
+
+
+def _search_root_action(config: dict, state: 'CompactState', action: Tuple[int, int], depth: int,
+                        initial_count: int, seed: int) -> Tuple[float, SearchStats]:
+    """
+    Pool worker: value of one root attack, searched with the best value any
+    worker has proven so far as alpha. Returns (value, search counters).
+    """
+    key = repr(sorted(config.items()))
+    ai = _worker_players.get(key)
+    if ai is None:
+        ai = _worker_players[key] = AIPlayer.from_search_config(config)
+    # A fresh table per task keeps the result independent of which worker ran what
+    ai.transposition_table.clear()
+    ai.move_ordering.clear()
+    ai.initial_count = initial_count
+    ai._nodes = 0
+    ai._stats = SearchStats()
+    ai._root_depth = depth
+    ai.rng.seed(seed)
+
+    alpha = _worker_shared_alpha.value - PARALLEL_ALPHA_MARGIN
+    src, dst = action
+    value = ai._search_attack(state, src, dst, depth, alpha, float('inf'), False, state.current)
+    if value > alpha:
+        # Exact value: raise the bound for the tasks that start after this one
+        with _worker_shared_alpha.get_lock():
+            if value > _worker_shared_alpha.value:
+                _worker_shared_alpha.value = value
+    stats = ai._stats
+    stats.nodes = ai._nodes
+    stats.tt_probes = ai.transposition_table.probes
+    stats.tt_hits = ai.transposition_table.hits
+    return value, stats
+
 class AIPlayer(Player):
-    def __init__(self, name: str, color: Tuple[int, int, int], depth: int = 3):
+    def __init__(self, name: str, color: Tuple[int, int, int], depth: int = 3, search: str = 'alphabeta'):
         super().__init__(name, color)
+        if search not in SEARCH_TYPES:
+            raise ValueError(f"Unknown search type: {search}")
         self.max_depth = depth
+        # alphabeta samples one roll per attack, expectiminimax averages over all rolls,
+        # mcts runs UCT rollouts over the rest of the turn
+        self.search = search
         self.target_continent = None
         self.defensive_territories = set()
         self.offensive_territories = set()
         self.monte_carlo_simulations = 1000  # Increased for better accuracy
+        self.exact_battle_odds = True  # Read battle odds from the exact tables instead of sampling
         self.heuristic_weights = {
             'territory_count': 1.0,      # +1 per territory
             'continent_control': 5.0,     # +5 for full continent
@@ -744,38 +1058,89 @@ class AIPlayer(Player):
             'enemy_neighbors': -2.0,      # -2 per weak region
             'army_strength': 0.5         # ± based on total count
         }
+        # Kept between the choose_attack calls of one attack phase, cleared at the next one
+        self.transposition_table = TranspositionTable()
+        # With a budget choose_attack deepens iteratively instead of searching to max_depth
+        self.time_budget = None  # seconds per choose_attack
+        self.node_budget = None  # alpha_beta nodes per choose_attack
+        self.last_search_depth = 0
+        # Killer moves and history live as long as the transposition table
+        self.move_ordering = MoveOrdering()
+        self.order_moves = True
+        self._nodes = 0
+        self._deadline = None
+        self._node_limit = None
+        self._root_depth = None
+        self._root_best = None
+        # Counters of the current choose_attack, and their sum over the game
+        self._stats = SearchStats()
+        self.search_stats = SearchStats()
+        # With 2+ workers a fixed-depth choose_attack splits the root moves over a process pool
+        self.parallel_workers = 0
+        # UCT tree, kept between the choose_attack calls of one attack phase
+        self.rng = random.Random()  # Sampling in searches; RiskGame.start_game seeds it from the game
+        self.mcts = MCTS(rng=self.rng)
+
+        
+
+    def search_config(self) -> dict:
+        """Settings a pool worker needs to search exactly like this player"""
+        return {
+            'depth': self.max_depth,
+            'search': self.search,
+            'monte_carlo_simulations': self.monte_carlo_simulations,
+            'exact_battle_odds': self.exact_battle_odds,
+            'heuristic_weights': dict(self.heuristic_weights),
+            'order_moves': self.order_moves,
+        }
 
-        
-
-    def heuristic(self, state: RiskGame, root_owner: Player) -> int:
+    def save_config(self) -> dict:
+        """search_config plus the budgets, as stored in a save game"""
+        config = self.search_config()
+        config.update(time_budget=self.time_budget, node_budget=self.node_budget,
+                      parallel_workers=self.parallel_workers)
+        return config
+
+    @classmethod
+    def from_save_config(cls, name: str, color: Tuple[int, int, int], config: dict) -> 'AIPlayer':
+        ai = cls.from_search_config(config)
+        ai.name = name
+        ai.color = color
+        ai.time_budget = config['time_budget']
+        ai.node_budget = config['node_budget']
+        ai.parallel_workers = config['parallel_workers']
+        return ai
+
+    @classmethod
+    def from_search_config(cls, config: dict) -> 'AIPlayer':
+        ai = cls('Search worker', (0, 0, 0), config['depth'], config['search'])
+        ai.monte_carlo_simulations = config['monte_carlo_simulations']
+        ai.exact_battle_odds = config['exact_battle_odds']
+        ai.heuristic_weights = dict(config['heuristic_weights'])
+        ai.order_moves = config['order_moves']
+        return ai
+
+    def heuristic(self, state: CompactState, root_owner: int) -> int:
         """
         Heuristic: net change in number of territories for root_owner
         compared to initial count when search began.
         """
         # Count territories at current state
-        current_count = sum(1 for t in state.territories.values() if t.owner.name == root_owner.name)
+        current_count = state.territory_count(root_owner)
         # Use stored initial count on the AI instance
-        # print('depth 0 reached ', current_count, self.initial_count)
         defenderLoss = 0
-        for terr in state.territories.values():
-            if terr.owner.name != root_owner.name:
-                defenderLoss = terr.owner.battle_stats['attacks_lost']
+        for owner in state.owner:
+            if owner != root_owner:
+                defenderLoss = state.attacks_lost[owner]
                 break
 
         return (current_count - self.initial_count + defenderLoss)
 
-    def generate_attack_actions(self, state: RiskGame, player: Player) -> List[Tuple[Territory, Territory]]:
+    def generate_attack_actions(self, state: CompactState, player: int) -> List[Tuple[int, int]]:
         """
-        Generate all valid (src, dest) attack moves for `player`.
+        Generate all valid (src, dest) attack moves for `player` as territory ids.
         """
-        actions = []
-        for src in state.territories.values():
-            if src.owner.name == player.name and src.troops > 1:
-                for conn_name in src.connections:
-                    dest = state.territories[conn_name]
-                    if dest.owner.name != player.name:
-                        actions.append((src.name, dest.name))
-        return actions
+        return state.attack_actions(player)
 
     def apply_attack(self, state: RiskGame, action: Tuple[str, str], rootOwner = 'Unk') -> bool:
         """
@@ -784,127 +1149,363 @@ class AIPlayer(Player):
         """
         src_name, dst_name = action
         try:
-            # print('before attack ', len([ter for ter in state.territories.values() if ter.owner.name == rootOwner]))
             state.attack(state.territories[src_name], state.territories[dst_name])
-            # print('before attack2 ', len([ter for ter in state.territories.values() if ter.owner.name == rootOwner]))
             return True
         except ValueError as e:
-            print('Cant attack ' , str(e) )
+            state._log('Cant attack ' , str(e) )
             return False
 
     def alpha_beta(self,
-                   state: RiskGame,
+                   state: CompactState,
                    depth: int,
                    alpha: int,
                    beta: int,
                    maximizing: bool,
-                   root_owner: Player) -> Tuple[int, Optional[Tuple[str, str]]]:
+                   root_owner: int,
+                   first_action: Optional[Tuple[int, int]] = None) -> Tuple[int, Optional[Tuple[int, int]]]:
         """
         Returns (value, best_action) at this node.
+        Attacks are applied to `state` in place and undone before returning.
+        `first_action` is searched before the others (the previous iteration's best move).
         """
-        # print(f'current player {root_owner.name}')
+        self._nodes += 1
+        if self._node_limit is not None and self._nodes > self._node_limit:
+            raise SearchTimeout()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
         if depth == 0:
-            # print('at depth 0')
+            self._stats.leaf_evaluations += 1
             return self.heuristic(state, root_owner), None
 
-        current_player = state.current_player if maximizing else self.get_opponent(state, root_owner)
+        alpha_orig, beta_orig = alpha, beta
+        tt = self.transposition_table
+        key = state.hash ^ SIDE_KEYS[maximizing]
+        entry = tt.probe(key)
+        tt_action = None
+        if entry is not None:
+            tt_action = entry.best_action
+            if entry.depth >= depth:
+                # Table values leave out initial_count so they stay valid between choose_attack calls
+                stored = entry.value - self.initial_count
+                if entry.flag == EXACT:
+                    return stored, entry.best_action
+                if entry.flag == LOWER_BOUND:
+                    alpha = max(alpha, stored)
+                else:
+                    beta = min(beta, stored)
+                if alpha >= beta:
+                    return stored, entry.best_action
+
+        current_player = root_owner if maximizing else self.get_opponent(state, root_owner)
         actions = self.generate_attack_actions(state, current_player)
-        # print('possible actions ', len(actions))
         if not actions:
             # No possible attacks: evaluate state
-            # print('no actions left')
+            self._stats.leaf_evaluations += 1
             return self.heuristic(state, root_owner), None
-
-        debugVals = []
+        stats = self._stats
+        stats.expanded += 1
+        stats.children += len(actions)
+        ply = 0 if self._root_depth is None else self._root_depth - depth
+        if self.order_moves:
+            actions = self.move_ordering.order(state, actions, current_player, ply, (first_action, tt_action))
+        else:
+            for preferred in (tt_action, first_action):
+                if preferred in actions:
+                    # Try the previous best move, then the best move from the table, first
+                    actions.remove(preferred)
+                    actions.insert(0, preferred)
 
         best_action = None
         if maximizing:
-            # print('meximixing ',len([ter for ter in state.territories.values() if ter.owner.name == root_owner.name]))
             value = float('-inf')
-            for action in actions:
-                new_state = copy.deepcopy(state)
-                new_state.current_player = current_player
-                self.apply_attack(new_state, action, root_owner.name)
-                # new_state.end_phase()  # proceed game phases if needed
-                v, _ = self.alpha_beta(new_state, depth - 1, alpha, beta, False, root_owner)
-                debugVals.append(v)
+            for index, (src, dst) in enumerate(actions):
+                v = self._search_attack(state, src, dst, depth, alpha, beta, False, root_owner)
                 if v > value:
-                    value, best_action = v, action
+                    value, best_action = v, (src, dst)
+                    if depth == self._root_depth:
+                        self._root_best = (value, best_action)
                 alpha = max(alpha, value)
                 if alpha >= beta:
+                    self.move_ordering.record_cutoff((src, dst), ply, depth, index == 0)
+                    stats.cutoffs[ply] = stats.cutoffs.get(ply, 0) + 1
                     break  # beta cutoff
-                
-            # print('returning ',value, ' ', best_action, ' ', 'maxi among:', debugVals)
-            return value, best_action
         else:
-            # print('mininzing ',len([ter for ter in state.territories.values() if ter.owner.name == root_owner.name]))
             value = float('inf')
-            for action in actions:
-                new_state = copy.deepcopy(state)
-                new_state.current_player = current_player
-                self.apply_attack(new_state, action, root_owner.name)
-                # new_state.end_phase()
-                v, _ = self.alpha_beta(new_state, depth - 1, alpha, beta, True, root_owner)
-                debugVals.append(v)
+            for index, (src, dst) in enumerate(actions):
+                v = self._search_attack(state, src, dst, depth, alpha, beta, True, root_owner)
                 if v < value:
-                    value, best_action = v, action
+                    value, best_action = v, (src, dst)
                 beta = min(beta, value)
                 if beta <= alpha:
+                    self.move_ordering.record_cutoff((src, dst), ply, depth, index == 0)
+                    stats.cutoffs[ply] = stats.cutoffs.get(ply, 0) + 1
                     break  # alpha cutoff
-            # print('returning ',value, ' ', best_action, ' ', 'mini among ', debugVals)
-            return value, best_action
 
-    def get_opponent(self, state: RiskGame, player: Player) -> Player:
+        if value <= alpha_orig:
+            flag = UPPER_BOUND
+        elif value >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        tt.store(key, depth, value + self.initial_count, flag, best_action)
+        return value, best_action
+
+    def _search_attack(self, state: CompactState, src: int, dst: int, depth: int,
+                       alpha: float, beta: float, maximizing: bool, root_owner: int) -> float:
+        """Value of attacking src -> dst from a node at `depth`; `maximizing` is the side to move after it"""
+        if self.search == 'expectiminimax':
+            return self._chance_node(state, src, dst, depth, alpha, beta, maximizing, root_owner)
+
+        # Plain alpha-beta follows a single sampled roll
+        state.make_attack(src, dst, *state.roll_losses(src, dst, self.rng))
+        v, _ = self.alpha_beta(state, depth - 1, alpha, beta, maximizing, root_owner)
+        state.unmake_attack()
+        return v
+
+    def _chance_node(self, state: CompactState, src: int, dst: int, depth: int,
+                     alpha: float, beta: float, maximizing: bool, root_owner: int) -> float:
+        """
+        Expected value of attacking src -> dst over every roll outcome, with
+        Star1/Star2 pruning. Like alpha_beta, a result <= alpha is an upper bound
+        and a result >= beta is a lower bound.
+        """
+        outcomes = battle_odds.roll_outcomes(state.troops[src], state.troops[dst])
+        lower, upper = self._value_bounds(state, depth, root_owner)
+
+        if len(outcomes) > 1:
+            # Star2: probe every outcome with one move of the side to move. That bounds
+            # the outcome from below for a max node and from above for a min node.
+            probed = 0.0
+            remaining = 1.0
+            for attacker_losses, defender_losses, p in outcomes:
+                remaining -= p
+                state.make_attack(src, dst, attacker_losses, defender_losses)
+                if maximizing:
+                    target = (beta - probed - lower * remaining) / p
+                    v = self._probe(state, depth - 1, lower, min(upper, target), True, root_owner)
+                else:
+                    target = (alpha - probed - upper * remaining) / p
+                    v = self._probe(state, depth - 1, max(lower, target), upper, False, root_owner)
+                state.unmake_attack()
+                if v is None:
+                    break  # The probe gave no usable bound
+                probed += p * v
+                if maximizing and probed + lower * remaining >= beta:
+                    return probed + lower * remaining
+                if not maximizing and probed + upper * remaining <= alpha:
+                    return probed + upper * remaining
+
+        # Star1: narrow each outcome's window by what the others can still contribute
+        total = 0.0
+        remaining = 1.0
+        for attacker_losses, defender_losses, p in outcomes:
+            remaining -= p
+            child_alpha = (alpha - total - upper * remaining) / p
+            child_beta = (beta - total - lower * remaining) / p
+            if child_alpha >= upper:
+                return total + p * upper + upper * remaining
+            if child_beta <= lower:
+                return total + p * lower + lower * remaining
+            state.make_attack(src, dst, attacker_losses, defender_losses)
+            v, _ = self.alpha_beta(state, depth - 1, max(lower, child_alpha), min(upper, child_beta),
+                                   maximizing, root_owner)
+            state.unmake_attack()
+            if v <= child_alpha:
+                return total + p * v + upper * remaining
+            if v >= child_beta:
+                return total + p * v + lower * remaining
+            total += p * v
+        return total
+
+    def _probe(self, state: CompactState, depth: int, alpha: float, beta: float,
+               maximizing: bool, root_owner: int) -> Optional[float]:
+        """
+        Search only the first move of a node. The result is a lower bound on a
+        max node and an upper bound on a min node, or None if the window cut it
+        off on the wrong side.
+        """
+        if depth == 0:
+            self._stats.leaf_evaluations += 1
+            return self.heuristic(state, root_owner)
+        current_player = root_owner if maximizing else self.get_opponent(state, root_owner)
+        actions = self.generate_attack_actions(state, current_player)
+        if not actions:
+            self._stats.leaf_evaluations += 1
+            return self.heuristic(state, root_owner)
+
+        entry = self.transposition_table.probe(state.hash ^ SIDE_KEYS[maximizing])
+        if entry is not None and entry.best_action in actions:
+            src, dst = entry.best_action
+        else:
+            ply = 0 if self._root_depth is None else self._root_depth - depth
+            src, dst = self.move_ordering.order(state, actions, current_player, ply)[0]
+        v = self._chance_node(state, src, dst, depth, alpha, beta, not maximizing, root_owner)
+        if (maximizing and v <= alpha) or (not maximizing and v >= beta):
+            return None
+        return v
+
+    def _value_bounds(self, state: CompactState, depth: int, root_owner: int) -> Tuple[float, float]:
+        """Lowest and highest heuristic reachable within `depth` more attacks"""
+        # Each attack moves the territory count and one attacks_lost counter by at most 1
+        count = state.territory_count(root_owner) - self.initial_count
+        most_lost = max((lost for player, lost in enumerate(state.attacks_lost) if player != root_owner), default=0)
+        return count - depth, count + depth + most_lost + depth
+
+    def get_opponent(self, state: CompactState, player: int) -> int:
         # Simplest: pick next in players list
-        # tempPlayers = []
-        # for temp in state.players:
-            # tempPlayers.append([temp.name, temp.__class__ ])
-        # print('checking for player ', player, state.players)
-        idx = -1
-        for ind,item in enumerate(state.players):
-            if item.name == player.name:
-                idx = ind
-                break
-        # idx = state.players.index(player)
-        if idx == -1:
-            raise Exception('No player found for opponent')
-        
-        return state.players[(idx + 1) % len(state.players)]
+        return state.next_player(player)
 
-    def choose_attack(self, game: RiskGame) -> Optional[Tuple[str, str]]:
+    def choose_attack(self, game: RiskGame, time_budget: Optional[float] = None,
+                      node_budget: Optional[int] = None) -> Tuple[float, Optional[Tuple[str, str]], SearchStats]:
+        """
+        Returns (value, (src name, dst name) or None, counters of this search).
+        The counters are also added to self.search_stats.
+        """
+        start = time.perf_counter()
+        tt = self.transposition_table
+        tt_probes, tt_hits = tt.probes, tt.hits
+        stats = self._stats = SearchStats()
+        # Search runs on a compact copy of the board, the live game is left untouched
+        state = CompactState.from_game(game)
         # Initialize root metrics
-        self.initial_count = sum(1 for t in game.territories.values() if t.owner == game.current_player)
-        # print('aplha beta called ', self.initial_count)
-        value, action = self.alpha_beta(game, self.max_depth, float('-inf'), float('inf'), True, game.current_player)
-        # print('aplha beta done')
-        return value,action
+        self.initial_count = state.territory_count(state.current)
+        tt.new_search()
+        self._nodes = 0
+
+        time_budget = self.time_budget if time_budget is None else time_budget
+        node_budget = self.node_budget if node_budget is None else node_budget
+        if self.search == 'mcts':
+            # The node budget caps MCTS iterations
+            if time_budget is None and node_budget is None:
+                time_budget = MCTS_TIME_BUDGET
+            value, action = self.mcts.search(state, time_budget, node_budget)
+            self._nodes = self.mcts.iterations
+            self.last_search_depth = 0
+        elif time_budget is None and node_budget is None:
+            self._root_depth = self.max_depth
+            try:
+                if self.parallel_workers > 1:
+                    value, action = self._parallel_root_search(state, self.max_depth)
+                else:
+                    value, action = self.alpha_beta(state, self.max_depth, float('-inf'), float('inf'),
+                                                    True, state.current)
+            finally:
+                self._root_depth = None
+            self.last_search_depth = self.max_depth
+        else:
+            value, action = self._iterative_deepening(state, time_budget, node_budget)
+        if action is not None:
+            names = state.topology.names
+            action = (names[action[0]], names[action[1]])
+
+        stats.decisions = 1
+        stats.nodes = self._nodes
+        stats.tt_probes += tt.probes - tt_probes
+        stats.tt_hits += tt.hits - tt_hits
+        stats.depth_total = stats.max_depth = self.last_search_depth
+        stats.elapsed = time.perf_counter() - start
+        self.search_stats.merge(stats)
+        return value, action, stats
+
+    def _parallel_root_search(self, state: CompactState, depth: int) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """
+        alpha_beta at the root with each root attack searched in a pool worker.
+        The most promising move is searched alone first so the others start
+        with its value as alpha. Ties go to the earlier move in search order,
+        so the chosen move does not depend on which worker finishes first.
+        """
+        root_owner = state.current
+        actions = self.generate_attack_actions(state, root_owner)
+        if not actions:
+            return self.heuristic(state, root_owner), None
+        if self.order_moves:
+            actions = self.move_ordering.order(state, actions, root_owner, 0)
+
+        executor, shared_alpha = _search_pool(self.parallel_workers)
+        shared_alpha.value = float('-inf')
+        config = self.search_config()
+        seeds = [self.rng.getrandbits(32) for _ in actions]
+
+        def submit(i):
+            return executor.submit(_search_root_action, config, state, actions[i], depth,
+                                   self.initial_count, seeds[i])
+
+        results = [submit(0).result()]
+        futures = [submit(i) for i in range(1, len(actions))]
+        results.extend(future.result() for future in futures)
+
+        # Values at or below a worker's alpha are only upper bounds, but those moves
+        # are strictly worse than the one that set that alpha, so they never win
+        best = max(range(len(actions)), key=lambda i: (results[i][0], -i))
+        for _, stats in results:
+            self._nodes += stats.nodes
+            self._stats.merge(stats)
+        return results[best][0], actions[best]
+
+    def _iterative_deepening(self, state: CompactState, time_budget: Optional[float],
+                             node_budget: Optional[int]) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """Search depth 1, 2, ... until the budget runs out and return the best move found so far"""
+        start = time.perf_counter()
+        best = (self.heuristic(state, state.current), None)
+        for depth in range(1, MAX_ITERATIVE_DEPTH + 1):
+            # Depth 1 always runs to completion so there is a move to fall back on
+            if depth > 1:
+                self._deadline = None if time_budget is None else start + time_budget
+                self._node_limit = node_budget
+            self._root_depth = depth
+            self._root_best = None
+            try:
+                best = self.alpha_beta(state, depth, float('-inf'), float('inf'), True, state.current,
+                                       first_action=best[1])
+                self.last_search_depth = depth
+            except SearchTimeout:
+                # The previous best move is searched first, so a move that beat it
+                # in the unfinished iteration is the better choice
+                if self._root_best is not None:
+                    best = self._root_best
+                break
+            finally:
+                self._deadline = None
+                self._node_limit = None
+                self._root_depth = None
+        return best
 
     def evaluate_territory(self, territory: Territory, game: 'RiskGame') -> float:
         """Evaluate a territory's strategic value"""
+        state = CompactState.from_game(game)
+        return self._evaluate_territory(state, state.topology.index[territory.name], game.players.index(self))
+
+    def _evaluate_territory(self, state: CompactState, territory: int, me: int) -> float:
+        """evaluate_territory on a compact state, `me` is this player's index"""
+        topology = state.topology
+        troops = state.troops
         score = 0.0
         
         # Base territory value
         score += self.heuristic_weights['territory_count']
         
         # Continent control value
-        continent_territories = [t for t in game.territories.values() if t.continent == territory.continent]
-        if all(t.owner == self for t in continent_territories):
+        if state.owns_continent(me, topology.continent_of[territory]):
             score += self.heuristic_weights['continent_control']
         
         # Border troops value
-        enemy_neighbors = sum(1 for c in territory.connections 
-                            if game.territories[c].owner != self)
+        enemy_mask = topology.neighbor_masks[territory] & ~state.owned[me]
+        enemy_neighbors = enemy_mask.bit_count()
+        total_enemy_troops = 0
+        if enemy_mask:
+            for neighbor in topology.neighbors[territory]:
+                if enemy_mask >> neighbor & 1:
+                    total_enemy_troops += troops[neighbor]
         if enemy_neighbors > 0:
-            score += territory.troops * self.heuristic_weights['border_troops']
+            score += troops[territory] * self.heuristic_weights['border_troops']
         
         # Enemy neighbors penalty
         score += enemy_neighbors * self.heuristic_weights['enemy_neighbors']
         
         # Army strength comparison
-        total_enemy_troops = sum(t.troops for t in game.territories.values() 
-                               if t.owner != self and t.name in territory.connections)
         if total_enemy_troops > 0:
-            strength_diff = territory.troops - total_enemy_troops
+            strength_diff = troops[territory] - total_enemy_troops
             score += strength_diff * self.heuristic_weights['army_strength']
         
         return score
@@ -913,14 +1514,16 @@ class AIPlayer(Player):
         """Update AI's strategic targets and territory classifications"""
         # Choose target continent based on current holdings and potential
         continent_scores = {}
+        owned_mask = game.owner_masks.get(self, 0)
+        reachable = game.adjacent_mask(self) & ~owned_mask
         for continent, bonus in game.continent_bonus.items():
-            continent_territories = [t for t in game.territories.values() if t.continent == continent]
-            owned = sum(1 for t in continent_territories if t.owner == self)
-            potential = sum(1 for t in continent_territories 
-                          if t.owner != self and 
-                          any(c.owner == self for c in [game.territories[conn] for conn in t.connections]))
+            continent_mask = game.continent_masks[continent]
+            size = continent_mask.bit_count()
+            owned = game.owned_in_continent(self, continent)
+            # Enemy territories of the continent next to one of ours
+            potential = (continent_mask & reachable).bit_count()
             # Score based on ownership percentage and potential for expansion
-            continent_scores[continent] = (owned / len(continent_territories)) * (1 + potential/len(continent_territories))
+            continent_scores[continent] = (owned / size) * (1 + potential / size)
         
         self.target_continent = max(continent_scores.items(), key=lambda x: x[1])[0]
         
@@ -930,7 +1533,7 @@ class AIPlayer(Player):
         
         for territory in self.territories:
             # Check if territory is on border with enemy
-            is_border = any(t.owner != self for t in [game.territories[c] for c in territory.connections])
+            is_border = game.neighbor_masks[territory.name] & ~owned_mask != 0
             
             if is_border:
                 if territory.continent == self.target_continent:
@@ -938,88 +1541,74 @@ class AIPlayer(Player):
                 else:
                     self.offensive_territories.add(territory)
 
-    def _reinforcement_phase(self, game: 'RiskGame', gui):
+    def _reinforcement_phase(self, game: 'RiskGame', gui=None):
         """Place reinforcements strategically"""
-        while self.reinforcements > 0:
+        state = CompactState.from_game(game)
+        me = game.players.index(self)
+        index = state.topology.index
+        while self.reinforcements > 0 and self.territories:
             # Evaluate all territories
             territory_scores = {}
             for territory in self.territories:
-                score = self.evaluate_territory(territory, game)
+                score = self._evaluate_territory(state, index[territory.name], me)
                 territory_scores[territory] = score
             
             # Reinforce the territory with highest score
             best_territory = max(territory_scores.items(), key=lambda x: x[1])[0]
-            gui.selected_territory = best_territory
             game.reinforce(best_territory)
+            state.troops[index[best_territory.name]] += 1
             
-            events = pygame.event.get()
-            gui.render()
-            pygame.time.delay(2000)
+            if gui is not None:
+                gui.selected_territory = best_territory
+                gui.show_ai_move(2000)
 
     def monte_carlo_simulate_attack(self, attacker: Territory, defender: Territory) -> float:
         """Simulate attack multiple times using Monte Carlo method"""
-        wins = 0
-        total_troops_lost = 0
-        
-        for _ in range(self.monte_carlo_simulations):
-            # Create copies of territories for simulation
-            sim_attacker = Territory(attacker.name, attacker.continent)
-            sim_attacker.troops = attacker.troops
-            sim_defender = Territory(defender.name, defender.continent)
-            sim_defender.troops = defender.troops
-            
-            # Simulate combat until one side is defeated
-            while sim_attacker.troops > 1 and sim_defender.troops > 0:
-                # Roll dice
-                attacker_dice = min(3, sim_attacker.troops - 1)
-                defender_dice = min(2, sim_defender.troops)
-                attacker_rolls = sorted([random.randint(1, 6) for _ in range(attacker_dice)], reverse=True)
-                defender_rolls = sorted([random.randint(1, 6) for _ in range(defender_dice)], reverse=True)
-                
-                # Compare dice and apply losses
-                for a_roll, d_roll in zip(attacker_rolls, defender_rolls):
-                    if a_roll > d_roll:
-                        sim_defender.troops -= 1
-                    else:
-                        sim_attacker.troops -= 1
-            
-            if sim_defender.troops <= 0:
-                wins += 1
-                total_troops_lost += (attacker.troops - sim_attacker.troops)
-        
-        win_rate = wins / self.monte_carlo_simulations
-        avg_troops_lost = total_troops_lost / self.monte_carlo_simulations if wins > 0 else float('inf')
-        
-        # Return a score that considers both win rate and troop loss
-        return win_rate * (1 - (avg_troops_lost / attacker.troops))
+        if self.exact_battle_odds:
+            return battle_odds.attack_score(attacker.troops, defender.troops)
+
+        return self.monte_carlo_simulate_attacks([(attacker, defender)])[0]
+
+    def monte_carlo_simulate_attacks(self, attacks: List[Tuple[Territory, Territory]]) -> List[float]:
+        """monte_carlo_simulate_attack for every candidate attack in one batch"""
+        if self.exact_battle_odds:
+            return [battle_odds.attack_score(a.troops, d.troops) for a, d in attacks]
 
-    def _attack_phase(self, game: 'RiskGame', gui):
+        scores = battle_odds.sample_attack_scores(
+            [a.troops for a, _ in attacks],
+            [d.troops for _, d in attacks],
+            self.monte_carlo_simulations,
+            np.random.default_rng(self.rng.getrandbits(64))
+        )
+        return scores.tolist()
+
+    def _attack_phase(self, game: 'RiskGame', gui=None):
         """Execute attacks based on Monte Carlo simulation results"""
         # Get all possible attacks and evaluate them
         possible_attacks = []
-        print('entered in attack phase')
+        game._log('entered in attack phase')
+        self.transposition_table.clear()
+        self.move_ordering.clear()
+        self.mcts.reset()
 
         for _ in range(10):
-            actionScore, action = self.choose_attack(game)
+            actionScore, action, _ = self.choose_attack(game)
             if action and actionScore > 0: # to chcek whether it should be negative or positive
-                fromName, toName = action
-                fromTer = game.territories[fromName]  # Use game's territories dictionary
-                toTer = game.territories[toName]      # Use game's territories dictionary
-                gui.selected_territory = fromTer
-                gui.target_territory = toTer
-                gui.render()
+                if gui is not None:
+                    fromName, toName = action
+                    gui.selected_territory = game.territories[fromName]  # Use game's territories dictionary
+                    gui.target_territory = game.territories[toName]      # Use game's territories dictionary
+                    gui.show_ai_move(500)
                 
-                pygame.time.delay(500)
-                print('ai player found the best action ',action)
+                game._log('ai player found the best action ',action)
                 self.apply_attack(game,action)
-                print('action taken')
+                game._log('action taken')
             else:
-                print('no action is best ',action, ' ', actionScore)
+                game._log('no action is best ',action, ' ', actionScore)
                 break
 
-            events = pygame.event.get()
-            gui.render()
-            pygame.time.delay(2000)
+            if gui is not None:
+                gui.show_ai_move(2000)
         
         # Sort attacks by score
         # possible_attacks.sort(key=lambda x: x[2], reverse=True)
@@ -1042,7 +1631,7 @@ class AIPlayer(Player):
         #         possible_attacks.pop(0)
 
 
-    def _fortify_phase(self, game: 'RiskGame', gui):
+    def _fortify_phase(self, game: 'RiskGame', gui=None):
         """Move troops to improve defensive position"""
         # Find territories that can fortify
         can_fortify = [t for t in self.territories if t.troops > 1]
@@ -1052,10 +1641,14 @@ class AIPlayer(Player):
         # Evaluate fortification moves
         best_move = None
         best_score = float('-inf')
+        state = CompactState.from_game(game)
+        me = game.players.index(self)
+        index = state.topology.index
         
+        owned_mask = game.owner_masks.get(self, 0)
         for source in can_fortify:
             # Skip territories on enemy borders
-            if any(game.territories[c].owner != self for c in source.connections):
+            if game.neighbor_masks[source.name] & ~owned_mask:
                 continue
                 
             for connection in source.connections:
@@ -1065,8 +1658,7 @@ class AIPlayer(Player):
                     troops_to_move = source.troops // 2
                     if troops_to_move > 0:
                         # Evaluate the move
-                        current_score = self.evaluate_territory(target, game)
-                        new_score = self.evaluate_territory(target, game) + (troops_to_move * 0.5)
+                        new_score = self._evaluate_territory(state, index[target.name], me) + (troops_to_move * 0.5)
                         
                         if new_score > best_score:
                             best_score = new_score
@@ -1075,19 +1667,20 @@ class AIPlayer(Player):
         if best_move:
             source, target, troops = best_move
             try:
-                gui.selected_territory = source
-                gui.render()
-                pygame.time.delay(500)
+                if gui is not None:
+                    gui.selected_territory = source
+                    gui.show_ai_move(500)
                 
-                events = pygame.event.get()
                 game.fortify(source, target, troops)
-                pygame.time.delay(2000)
-                gui.render()
+                if gui is not None:
+                    gui.show_ai_move(2000)
 
             except ValueError:
                 pass
 
 def main():
+    import pygame
+
     try:
         # Initialize the menu GUI
         from menu_gui import MenuGUI
@@ -1122,14 +1715,7 @@ def main():
         else:
             try:
                 # Add players based on settings
-                colors = [
-                    (255, 0, 0),    # Red
-                    (0, 0, 255),    # Blue
-                    (0, 255, 0),    # Green
-                    (255, 255, 0),  # Yellow
-                    (255, 0, 255),  # Magenta
-                    (0, 255, 255)   # Cyan
-                ]
+                colors = PLAYER_COLORS
                 
                 print("Creating game with settings:", result)  # Debug print
                 
@@ -1156,9 +1742,11 @@ def main():
                 
                 # Add AI players
                 print(f"Adding {num_ai} AI players")  # Debug print
+                ai_strategies = result.get('ai_strategies', [])
                 for i in range(num_ai):
                     name = f"AI Player {i+1}"
-                    ai_player = AIPlayer(name, colors[num_human_players + i])
+                    strategy = ai_strategies[i] if i < len(ai_strategies) else 'alphabeta'
+                    ai_player = AIPlayer(name, colors[num_human_players + i], search=strategy)
                     ai_player.max_cards = int(result['max_cards'])
                     game.players.append(ai_player)
                     # if not sampleAiPlayer:
@@ -0,0 +1,211 @@
+"""Action logs of whole games and a headless replay engine with seeking.
+
+An ActionLog listens to a RiskGame and keeps every action it records
+(reinforce, attack with its dice, fortify, card trades, phases, end_turn
+with the random event's picks) in the binary record format of the save
+game journal, plus a snapshot keyframe every few turns.  Replay applies
+the stream to a fresh game at full speed without rolling any dice, and
+seeks to a turn by restoring the nearest earlier keyframe and applying the
+records from there.
+
+    python simulation.py --games 1 --seed 7 --record logs
+    python replay.py logs/game_1.rlog --turn 40
+    python replay.py logs/game_1.rlog --verify
+"""
+import argparse
+import bisect
+import os
+import struct
+import time
+from typing import List, Optional, Tuple
+
+import savegame
+from project import RiskGame, Card
+
+LOG_MAGIC = b'RISKRLOG'
+LOG_VERSION = 1
+KEYFRAME_INTERVAL = 10  # Turns between keyframes
+
+
+class ActionLog:
+    """Listener that keeps a game's action stream in memory with periodic keyframes"""
+
+    def __init__(self, game: RiskGame, keyframe_interval: int = KEYFRAME_INTERVAL):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.game = game
+        self.keyframe_interval = keyframe_interval
+        self.index = {name: i for i, name in enumerate(game.territories)}
+        self.stream = bytearray()
+        self.keyframes = []  # (turn, stream offset, snapshot), in turn order
+        self._keyframe_due = False
+        self._add_keyframe()
+
+    @classmethod
+    def attach(cls, game: RiskGame, keyframe_interval: int = KEYFRAME_INTERVAL) -> 'ActionLog':
+        log = cls(game, keyframe_interval)
+        game.action_listeners.append(log)
+        return log
+
+    def _add_keyframe(self):
+        self.keyframes.append((self.game.turn, len(self.stream), savegame.encode_snapshot(self.game)))
+        self._keyframe_due = False
+
+    def __call__(self, action: str, args: tuple):
+        # end_turn records before the turn passes on, so its keyframe waits for the next action
+        if self._keyframe_due:
+            self._add_keyframe()
+        self.stream += savegame.encode_record(action, args, self.index)
+        if action == 'end_turn' and self.game.turn % self.keyframe_interval == 0:
+            self._keyframe_due = True
+
+    def save(self, path: str):
+        """Write the keyframes, the stream and a snapshot of the final board"""
+        final = savegame.encode_snapshot(self.game)
+        data = bytearray(LOG_MAGIC)
+        data += struct.pack('<HI', LOG_VERSION, len(self.keyframes))
+        for turn, offset, snapshot in self.keyframes:
+            data += struct.pack('<III', turn, offset, len(snapshot)) + snapshot
+        data += struct.pack('<I', len(final)) + final
+        data += struct.pack('<I', len(self.stream)) + self.stream
+        savegame.write_atomic(path, bytes(data))
+
+
+def load_log(path: str) -> Tuple[List[Tuple[int, int, bytes]], bytes, bytes]:
+    """(keyframes, final snapshot, stream) of an action log file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(LOG_MAGIC)] != LOG_MAGIC:
+        raise ValueError("Not an action log")
+    try:
+        offset = len(LOG_MAGIC)
+        version, count = struct.unpack_from('<HI', data, offset)
+        if version != LOG_VERSION:
+            raise ValueError(f"Unsupported action log version {version}")
+        offset += 6
+        keyframes = []
+        for _ in range(count):
+            turn, stream_offset, length = struct.unpack_from('<III', data, offset)
+            offset += 12
+            keyframes.append((turn, stream_offset, data[offset:offset + length]))
+            offset += length
+        blobs = []
+        for _ in range(2):
+            length, = struct.unpack_from('<I', data, offset)
+            offset += 4
+            blobs.append(data[offset:offset + length])
+            offset += length
+    except struct.error as e:
+        raise ValueError(f"Corrupt action log: {e}") from e
+    final, stream = blobs
+    return keyframes, final, stream
+
+
+class Replay:
+    """Re-applies an action stream to a quiet game; seek() jumps to the start of any turn"""
+
+    def __init__(self, keyframes: List[Tuple[int, int, bytes]], stream: bytes, final: Optional[bytes] = None):
+        if not keyframes:
+            raise ValueError("An action log needs at least one keyframe")
+        self.keyframes = keyframes
+        self.keyframe_turns = [turn for turn, _, _ in keyframes]
+        self.stream = stream
+        self.final = final
+        self.game = RiskGame()
+        self.game.verbose = False
+        self.game.initialize_game()
+        self._names = list(self.game.territories)
+        self.offset = None  # Stream position of the next record, None before the first seek
+        self.records_applied = 0
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        keyframes, final, stream = load_log(path)
+        return cls(keyframes, stream, final)
+
+    def _restore(self, keyframe: Tuple[int, int, bytes]):
+        _, offset, snapshot = keyframe
+        savegame.restore_snapshot(self.game, savegame.decode_snapshot(snapshot), RiskGame.player_from_save, Card)
+        self.offset = offset
+
+    def step(self) -> Optional[str]:
+        """Apply the next record; returns its action, or None at the end of the stream"""
+        if self.offset is None:
+            self._restore(self.keyframes[0])
+        for action, payload, end in savegame.iter_records(self.stream, self.offset):
+            savegame.replay(self.game, action, payload, self._names)
+            self.offset = end
+            self.records_applied += 1
+            return action
+        return None
+
+    def seek(self, turn: int) -> RiskGame:
+        """The game at the start of `turn` (or at the end of the log if it stops earlier)"""
+        keyframe = self.keyframes[max(0, bisect.bisect_right(self.keyframe_turns, turn) - 1)]
+        # Playing on from where we are beats restoring when no closer keyframe lies in between
+        if self.offset is None or self.game.turn > turn or self.offset < keyframe[1]:
+            self._restore(keyframe)
+        while self.game.turn < turn and self.step() is not None:
+            pass
+        return self.game
+
+    def run(self) -> RiskGame:
+        """Apply every remaining record"""
+        while self.step() is not None:
+            pass
+        return self.game
+
+    def verify(self) -> bool:
+        """Whether replaying from the first keyframe ends on the logged final board"""
+        if self.final is None:
+            raise ValueError("This log has no final snapshot")
+        self._restore(self.keyframes[0])
+        self.run()
+        replayed = savegame.decode_snapshot(savegame.encode_snapshot(self.game))
+        logged = savegame.decode_snapshot(self.final)
+        # Replays never roll or search, so only the random streams may differ
+        for snapshot in (replayed, logged):
+            snapshot.pop('rng')
+            for player in snapshot['players']:
+                player.pop('search_rng')
+        return replayed == logged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game")
+    parser.add_argument("log", help="action log written by simulation.py --record")
+    parser.add_argument("--turn", type=int, help="show the board at the start of this turn")
+    parser.add_argument("--verify", action="store_true",
+                        help="replay the whole log and check it ends on the recorded board")
+    args = parser.parse_args()
+
+    try:
+        replay = Replay.load(args.log)
+    except (OSError, ValueError) as e:
+        parser.error(f"Could not load {args.log}: {e}")
+
+    start = time.perf_counter()
+    if args.verify:
+        ok = replay.verify()
+    elif args.turn is not None:
+        replay.seek(args.turn)
+    else:
+        replay.run()
+    elapsed = time.perf_counter() - start
+
+    game = replay.game
+    print(f"{os.path.basename(args.log)}: turn {game.turn}, {game.current_player.name} to move "
+          f"({replay.records_applied} actions in {elapsed * 1000:.1f} ms, "
+          f"{len(replay.keyframes)} keyframes)")
+    for player in game.players:
+        troops = sum(t.troops for t in player.territories)
+        print(f"  {player.name}: {len(player.territories)} territories, {troops} troops, "
+              f"{len(player.cards)} cards")
+    if args.verify:
+        print("Replay matches the recorded game" if ok else "Replay DIVERGES from the recorded game")
+        if not ok:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Binary save games: a compact snapshot plus an append-only action journal.
+
+The snapshot holds everything a game needs to carry on: troops and owners
+by territory index, every player's hand and stats, the deck order, the
+turn, the phase and the state of the game's random stream and of each AI
+player's search stream.  It is written to a
+temporary file and moved into place, so a crash never leaves half a save.
+
+After a save every game action (see RiskGame._record) is appended to
+<path>.journal and flushed, so loading replays the actions since the
+snapshot instead of rewriting the whole game after each move.  Replayed
+actions never roll, so an action that moved the random stream is followed
+by an 'rng' record of its new state, and a loaded game goes on with the
+dice the saved one would have rolled next.  Likewise the end of an AI
+player's turn is followed by a 'search_rng' record of its search stream.  The journal header carries the
+CRC of its snapshot; a journal left over from an older save is ignored.
+"""
+import json
+import os
+import struct
+import zlib
+from array import array
+from typing import Callable, Iterator, List, Optional, Tuple
+
+MAGIC = b'RISKSAVE'
+JOURNAL_MAGIC = b'RISKJRNL'
+VERSION = 4  # 2: the game's own GameRNG state replaces the random module's; 3: journal 'rng' records;
+             # 4: AI players' search streams
+DEFAULT_PATH = 'savegame.risk'
+
+PHASES = ('reinforcement', 'attack', 'fortify')
+CARD_TYPES = ('infantry', 'cavalry', 'artillery', 'wild')
+WILD = 0xFFFF  # Territory index of a wild card
+NO_PLAYER = 0xFF
+
+# Journal record payloads, by action name
+ACTIONS = ('start_turn', 'reinforce', 'attack', 'fortify', 'trade_cards', 'end_turn', 'phase', 'rng', 'search_rng')
+RECORD_HEADER = struct.Struct('<BH')  # action, payload length
+_PAYLOADS = {
+    'start_turn': struct.Struct('<'),
+    'reinforce': struct.Struct('<HH'),     # territory, troops
+    'attack': struct.Struct('<HHBB'),      # attacker, defender, attacker losses, defender losses
+    'fortify': struct.Struct('<HHI'),      # from, to, troops
+    'trade_cards': struct.Struct('<B'),    # player
+    'end_turn': struct.Struct('<B'),       # event, followed by its chosen values as JSON
+    'phase': struct.Struct('<B'),
+    'rng': struct.Struct('<'),             # followed by the random stream's state as JSON
+    'search_rng': struct.Struct('<B'),     # player, followed by its search stream's state as JSON
+}
+
+
+def journal_path(path: str) -> str:
+    return path + '.journal'
+
+
+def map_checksum(game) -> int:
+    """CRC of the territory names and continents, so a save only loads onto the same map"""
+    text = '\n'.join(f"{name}:{t.continent}" for name, t in game.territories.items())
+    return zlib.crc32(text.encode())
+
+
+class _Writer:
+    def __init__(self):
+        self.data = bytearray()
+
+    def pack(self, fmt: str, *values):
+        self.data += struct.pack('<' + fmt, *values)
+
+    def string(self, text: str):
+        encoded = text.encode()
+        self.pack('H', len(encoded))
+        self.data += encoded
+
+    def array(self, typecode: str, values):
+        items = array(typecode, values)
+        self.pack('I', len(items))
+        self.data += items.tobytes()
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt: str):
+        values = struct.unpack_from('<' + fmt, self.data, self.offset)
+        self.offset += struct.calcsize('<' + fmt)
+        return values if len(values) > 1 else values[0]
+
+    def string(self) -> str:
+        length = self.unpack('H')
+        text = bytes(self.data[self.offset:self.offset + length]).decode()
+        self.offset += length
+        return text
+
+    def array(self, typecode: str) -> List[int]:
+        length = self.unpack('I')
+        items = array(typecode)
+        end = self.offset + length * items.itemsize
+        items.frombytes(self.data[self.offset:end])
+        self.offset = end
+        return items.tolist()
+
+
+def _write_cards(out: _Writer, cards, index: dict):
+    out.pack('H', len(cards))
+    for card in cards:
+        out.pack('HB', index.get(card.territory, WILD), CARD_TYPES.index(card.type))
+
+
+def search_rng_state(player) -> Optional[list]:
+    """The state of an AI player's search stream (a random.Random) as JSON values; None for humans"""
+    rng = getattr(player, 'rng', None)
+    if rng is None:
+        return None
+    version, internal, gauss = rng.getstate()
+    return [version, list(internal), gauss]
+
+
+def set_search_rng_state(player, state: list):
+    version, internal, gauss = state
+    player.rng.setstate((version, tuple(internal), gauss))
+
+
+def _read_cards(reader: _Reader) -> List[Tuple[int, str]]:
+    cards = []
+    for _ in range(reader.unpack('H')):
+        territory, card_type = reader.unpack('HB')
+        cards.append((territory, CARD_TYPES[card_type]))
+    return cards
+
+
+def encode_snapshot(game) -> bytes:
+    names = list(game.territories)
+    index = {name: i for i, name in enumerate(names)}
+    out = _Writer()
+    out.data += MAGIC
+    out.pack('H', VERSION)
+    out.string(game.game_id)
+    current = game.players.index(game.current_player) if game.current_player in game.players else NO_PLAYER
+    out.pack('IBBI', game.turn, PHASES.index(game.phase), current, map_checksum(game))
+    out.array('i', (game.territories[name].troops for name in names))
+
+    out.pack('B', len(game.players))
+    for player in game.players:
+        out.string(player.name)
+        out.pack('BBB', *player.color)
+        out.pack('iHB', player.reinforcements, player.sets_traded, player.max_cards)
+        stats = player.battle_stats
+        out.pack('iii', stats['attacks_won'], stats['attacks_lost'], stats['territories_conquered'])
+        # Territories in the order they were gained, which the AI iterates in
+        out.array('H', (index[t.name] for t in player.territories))
+        _write_cards(out, player.cards, index)
+        ai_config = player.save_config() if hasattr(player, 'save_config') else None
+        out.string('' if ai_config is None else json.dumps(ai_config))
+        search_rng = search_rng_state(player)
+        out.string('' if search_rng is None else json.dumps(search_rng))
+
+    _write_cards(out, game.card_deck, index)
+    out.string(json.dumps(game.rng.getstate()))
+    return bytes(out.data)
+
+
+def decode_snapshot(data: bytes) -> dict:
+    """Parse a snapshot into plain values; raises ValueError on anything that is not one"""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a save game")
+    reader = _Reader(data)
+    reader.offset = len(MAGIC)
+    try:
+        version = reader.unpack('H')
+        if version != VERSION:
+            raise ValueError(f"Unsupported save game version {version}")
+        snapshot = {'game_id': reader.string()}
+        snapshot['turn'], phase, snapshot['current'], snapshot['map'] = reader.unpack('IBBI')
+        snapshot['phase'] = PHASES[phase]
+        snapshot['troops'] = reader.array('i')
+
+        players = []
+        for _ in range(reader.unpack('B')):
+            player = {'name': reader.string(), 'color': reader.unpack('BBB')}
+            player['reinforcements'], player['sets_traded'], player['max_cards'] = reader.unpack('iHB')
+            player['battle_stats'] = reader.unpack('iii')
+            player['territories'] = reader.array('H')
+            player['cards'] = _read_cards(reader)
+            ai_config = reader.string()
+            player['ai'] = json.loads(ai_config) if ai_config else None
+            search_rng = reader.string()
+            player['search_rng'] = json.loads(search_rng) if search_rng else None
+            players.append(player)
+        snapshot['players'] = players
+
+        snapshot['deck'] = _read_cards(reader)
+        snapshot['rng'] = json.loads(reader.string())
+    except (struct.error, IndexError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Corrupt save game: {e}") from e
+    return snapshot
+
+
+def restore_snapshot(game, snapshot: dict, make_player: Callable, make_card: Callable):
+    """
+    Put a decoded snapshot into `game`, which must be initialized with the
+    same map. make_player(name, color, ai_config) builds each player,
+    make_card(territory, type) each card.
+    """
+    if snapshot['map'] != map_checksum(game):
+        raise ValueError("The save game is for a different map")
+    territories = list(game.territories.values())
+    if len(snapshot['troops']) != len(territories):
+        raise ValueError("The save game is for a different map")
+
+    def cards(encoded):
+        return [make_card("wild" if i == WILD else territories[i].name, card_type) for i, card_type in encoded]
+
+    for territory in territories:
+        territory.owner = None
+    game.players = []
+    game.continent_counts = {}
+    game.owner_masks = {}
+    for saved in snapshot['players']:
+        player = make_player(saved['name'], tuple(saved['color']), saved['ai'])
+        player.reinforcements = saved['reinforcements']
+        player.sets_traded = saved['sets_traded']
+        player.max_cards = saved['max_cards']
+        stats = player.battle_stats
+        stats['attacks_won'], stats['attacks_lost'], stats['territories_conquered'] = saved['battle_stats']
+        player.cards = cards(saved['cards'])
+        if saved['search_rng'] is not None:
+            set_search_rng_state(player, saved['search_rng'])
+        game.players.append(player)
+        for i in saved['territories']:
+            game.transfer_territory(territories[i], player)
+    for territory, troops in zip(territories, snapshot['troops']):
+        territory.troops = troops
+
+    current = snapshot['current']
+    game.current_player = game.players[current] if current != NO_PLAYER else None
+    game.card_deck = cards(snapshot['deck'])
+    game.game_id = snapshot['game_id']
+    game.turn = snapshot['turn']
+    game.phase = snapshot['phase']
+    game.rng.setstate(snapshot['rng'])
+
+
+def write_atomic(path: str, data: bytes):
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def encode_record(action: str, args: tuple, index: dict) -> bytes:
+    """One action as a record; `index` maps territory names to their position on the map"""
+    layout = _PAYLOADS[action]
+    if action == 'reinforce':
+        payload = layout.pack(index[args[0]], args[1])
+    elif action in ('attack', 'fortify'):
+        payload = layout.pack(index[args[0]], index[args[1]], *args[2:])
+    elif action == 'end_turn':
+        payload = layout.pack(args[0]) + json.dumps(args[1]).encode()
+    elif action == 'phase':
+        payload = layout.pack(PHASES.index(args[0]))
+    elif action == 'rng':
+        payload = json.dumps(args[0]).encode()
+    elif action == 'search_rng':
+        payload = layout.pack(args[0]) + json.dumps(args[1]).encode()
+    else:
+        payload = layout.pack(*args)
+    return RECORD_HEADER.pack(ACTIONS.index(action), len(payload)) + payload
+
+
+def iter_records(data: bytes, offset: int = 0) -> Iterator[Tuple[str, bytes, int]]:
+    """(action, payload, offset of the next record) from `offset` on; stops at a record cut short"""
+    while offset + RECORD_HEADER.size <= len(data):
+        action, length = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        if start + length > len(data) or action >= len(ACTIONS):
+            return
+        offset = start + length
+        yield ACTIONS[action], bytes(data[start:offset]), offset
+
+
+class Journal:
+    """
+    Action listener that appends every game action to the journal of a
+    snapshot, plus an 'rng' record whenever the game's random stream moved
+    and a 'search_rng' record after the turn of a player with a search stream
+    """
+
+    def __init__(self, path: str, snapshot: bytes, game, append: bool = False):
+        self.game = game
+        self.index = {name: i for i, name in enumerate(game.territories)}
+        self.rng_state = game.rng.getstate()
+        if append:
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(JOURNAL_MAGIC + struct.pack('<HI', VERSION, zlib.crc32(snapshot)))
+            self.file.flush()
+
+    def __call__(self, action: str, args: tuple):
+        record = encode_record(action, args, self.index)
+        rng_state = self.game.rng.getstate()
+        if rng_state != self.rng_state:
+            record += encode_record('rng', (rng_state,), self.index)
+            self.rng_state = rng_state
+        # end_turn is recorded before the turn passes on, so the current player is the one who moved
+        if action == 'end_turn':
+            search_rng = search_rng_state(self.game.current_player)
+            if search_rng is not None:
+                player = self.game.players.index(self.game.current_player)
+                record += encode_record('search_rng', (player, search_rng), self.index)
+        self.file.write(record)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_journal(path: str, snapshot: bytes) -> List[Tuple[str, bytes]]:
+    """
+    (action, payload) records of the journal at `path`. A missing journal or
+    one written for another snapshot has none; a record cut short by a crash
+    ends the journal.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    header = len(JOURNAL_MAGIC) + 6
+    if data[:len(JOURNAL_MAGIC)] != JOURNAL_MAGIC or len(data) < header:
+        return []
+    version, crc = struct.unpack_from('<HI', data, len(JOURNAL_MAGIC))
+    if version != VERSION or crc != zlib.crc32(snapshot):
+        return []
+
+    return [(action, payload) for action, payload, _ in iter_records(data, header)]
+
+
+def decode_record(action: str, payload: bytes, names: List[str]) -> tuple:
+    """The args an action was recorded with; `names` lists the territories in map order"""
+    if action == 'reinforce':
+        territory, troops = _PAYLOADS[action].unpack(payload)
+        return names[territory], troops
+    if action in ('attack', 'fortify'):
+        source, target, *rest = _PAYLOADS[action].unpack(payload)
+        return (names[source], names[target], *rest)
+    if action in ('end_turn', 'search_rng'):
+        size = _PAYLOADS[action].size
+        return _PAYLOADS[action].unpack(payload[:size])[0], json.loads(payload[size:])
+    if action == 'phase':
+        return PHASES[_PAYLOADS[action].unpack(payload)[0]],
+    if action == 'rng':
+        return json.loads(payload),
+    return _PAYLOADS[action].unpack(payload)
+
+
+def replay(game, action: str, payload: bytes, names: Optional[List[str]] = None):
+    """
+    Apply one record to `game` through RiskGame.apply_action, or restore a
+    random stream from an 'rng' or 'search_rng' record. Pass
+    list(game.territories) as `names` when replaying many.
+    """
+    if names is None:
+        names = list(game.territories)
+    args = decode_record(action, payload, names)
+    if action == 'rng':
+        game.rng.setstate(args[0])
+    elif action == 'search_rng':
+        set_search_rng_state(game.players[args[0]], args[1])
+    else:
+        game.apply_action(action, args)
@@ -0,0 +1,229 @@
+"""Shared machinery for the AIPlayer game-tree searches."""
+from typing import List, Optional, Tuple
+
+import battle_odds
+
+# Transposition table bound flags
+EXACT = 0
+LOWER_BOUND = 1  # value is at least this (search failed high)
+UPPER_BOUND = 2  # value is at most this (search failed low)
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its time or node budget is used up"""
+
+
+class SearchStats:
+    """Counters for one choose_attack call; merge() sums them over a game"""
+
+    def __init__(self):
+        self.decisions = 0
+        self.nodes = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = {}      # ply -> beta/alpha cutoffs at that ply
+        self.expanded = 0      # interior nodes that generated their moves
+        self.children = 0      # moves generated at those nodes
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.elapsed = 0.0     # seconds in choose_attack
+        self.depth_total = 0   # sum of the depth each decision completed
+        self.max_depth = 0
+
+    @property
+    def branching_factor(self) -> float:
+        return self.children / self.expanded if self.expanded else 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth_total / self.decisions if self.decisions else 0.0
+
+    def merge(self, other: 'SearchStats'):
+        self.decisions += other.decisions
+        self.nodes += other.nodes
+        self.leaf_evaluations += other.leaf_evaluations
+        for ply, count in other.cutoffs.items():
+            self.cutoffs[ply] = self.cutoffs.get(ply, 0) + count
+        self.expanded += other.expanded
+        self.children += other.children
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        self.elapsed += other.elapsed
+        self.depth_total += other.depth_total
+        self.max_depth = max(self.max_depth, other.max_depth)
+
+    def as_dict(self) -> dict:
+        return {
+            'decisions': self.decisions,
+            'nodes': self.nodes,
+            'leaf_evaluations': self.leaf_evaluations,
+            'cutoffs_by_ply': {str(ply): count for ply, count in sorted(self.cutoffs.items())},
+            'branching_factor': round(self.branching_factor, 3),
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_hit_rate': round(self.tt_hit_rate, 4),
+            'seconds': round(self.elapsed, 6),
+            'nodes_per_second': round(self.nodes_per_second, 1),
+            'mean_depth': round(self.mean_depth, 3),
+            'max_depth': self.max_depth,
+        }
+
+
+# XORed into CompactState.hash so max and min nodes of the same board get separate entries
+SIDE_KEYS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F)
+
+
+class TTEntry:
+    __slots__ = ('key', 'depth', 'value', 'flag', 'best_action', 'generation')
+
+    def __init__(self, key: int, depth: int, value: float, flag: int,
+                 best_action: Optional[Tuple[int, int]], generation: int):
+        self.key = key
+        self.depth = depth
+        self.value = value
+        self.flag = flag
+        self.best_action = best_action
+        self.generation = generation
+
+
+class TranspositionTable:
+    """Bounded table of search results keyed by Zobrist hash.
+
+    Every index has two slots: the first keeps the deepest result (unless it
+    is left over from an older search) and the second is always replaced, so
+    shallow results near the leaves cannot evict the expensive ones.
+    """
+
+    def __init__(self, size: int = 1 << 16):
+        if size & (size - 1):
+            raise ValueError("Transposition table size must be a power of two")
+        self.size = size
+        self.mask = size - 1
+        self.slots = [None] * (2 * size)
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def __getstate__(self):
+        # Copies and pickles (e.g. for parallel workers) keep the used slots only, not the whole array
+        state = self.__dict__.copy()
+        state['slots'] = {i: entry for i, entry in enumerate(self.slots) if entry is not None}
+        return state
+
+    def __setstate__(self, state):
+        used = state.pop('slots')
+        self.__dict__.update(state)
+        self.slots = [None] * (2 * self.size)
+        for i, entry in used.items():
+            self.slots[i] = entry
+
+    def clear(self):
+        self.slots = [None] * (2 * self.size)
+        self.generation = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """Age the stored entries so the next search may replace them"""
+        self.generation += 1
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        self.probes += 1
+        index = 2 * (key & self.mask)
+        for entry in (self.slots[index], self.slots[index + 1]):
+            if entry is not None and entry.key == key:
+                self.hits += 1
+                return entry
+        return None
+
+    def store(self, key: int, depth: int, value: float, flag: int,
+              best_action: Optional[Tuple[int, int]]):
+        self.stores += 1
+        index = 2 * (key & self.mask)
+        deep = self.slots[index]
+        if deep is None or deep.key == key or deep.depth <= depth or deep.generation != self.generation:
+            slot = index
+        else:
+            slot = index + 1
+        if self.slots[slot] is not None:
+            self.overwrites += 1
+        self.slots[slot] = TTEntry(key, depth, value, flag, best_action, self.generation)
+
+
+class MoveOrdering:
+    """Orders attack actions so alpha-beta finds its cutoffs early.
+
+    The previous iteration's best move and the transposition table move go
+    first, then the killer moves that caused a cutoff at the same ply, then
+    the rest by battle win probability (plus a bonus for captures that
+    complete a continent) with the history heuristic breaking ties.
+    """
+
+    KILLER_SLOTS = 2
+    CONTINENT_BONUS = 0.5  # added to the win probability of a continent-completing capture
+
+    def __init__(self):
+        self.killers = {}  # ply -> most recent cutoff moves
+        self.history = {}  # (src, dst) -> sum of depth^2 over its cutoffs
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """Share of cutoffs produced by the first move searched; 1.0 is perfect ordering"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def clear(self):
+        self.killers.clear()
+        self.history.clear()
+        self.reset_stats()
+
+    def order(self, state, actions: List[Tuple[int, int]], player: int, ply: int,
+              preferred: Tuple[Optional[Tuple[int, int]], ...] = ()) -> List[Tuple[int, int]]:
+        troops = state.troops
+        owner = state.owner
+        topology = state.topology
+        killers = self.killers.get(ply, ())
+        history = self.history
+
+        def score(action):
+            src, dst = action
+            if action in preferred:
+                return (3, -preferred.index(action), 0.0)
+            if action in killers:
+                return (2, -killers.index(action), 0.0)
+            value = battle_odds.win_probability(troops[src], troops[dst])
+            members = topology.continent_members[topology.continent_of[dst]]
+            if all(owner[t] == player for t in members if t != dst):
+                value += self.CONTINENT_BONUS
+            return (1, value, history.get(action, 0))
+
+        return sorted(actions, key=score, reverse=True)
+
+    def record_cutoff(self, action: Tuple[int, int], ply: int, depth: int, first: bool):
+        self.cutoffs += 1
+        if first:
+            self.first_move_cutoffs += 1
+        self.history[action] = self.history.get(action, 0) + depth * depth
+        killers = self.killers.setdefault(ply, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[self.KILLER_SLOTS:]
@@ -0,0 +1,109 @@
+"""Headless game driver for AI-vs-AI simulations.
+
+Plays complete games on a RiskGame without pygame so AI players can be
+balance-tested on a server, thousands of games at a time.
+"""
+import argparse
+import os
+import time
+from typing import Optional
+
+from project import RiskGame, Player, AIPlayer, PLAYER_COLORS, SEARCH_TYPES, shutdown_search_pools
+from replay import ActionLog
+
+
+class HeadlessGame:
+    def __init__(self, game: RiskGame, max_turns: int = 1000):
+        for player in game.players:
+            if not isinstance(player, AIPlayer):
+                raise ValueError(f"{player.name} is not an AI player")
+
+        self.game = game
+        self.max_turns = max_turns  # Games that stall are stopped as a draw
+        self.turns_played = 0
+        self.winner = None
+
+    def play_turn(self):
+        """Play reinforcement, attack and fortify for the current player, then end the turn"""
+        game = self.game
+        player = game.current_player
+
+        game.start_turn()
+        player._reinforcement_phase(game)
+        player._attack_phase(game)
+        player._fortify_phase(game)
+        event = game.end_turn()
+
+        self.turns_played += 1
+        return event
+
+    def run(self) -> Optional[Player]:
+        """Play until check_win_condition or max_turns; returns the winner, or None for a draw"""
+        while self.turns_played < self.max_turns:
+            if self.game.check_win_condition():
+                self.winner = max(self.game.players, key=lambda p: len(p.territories))
+                break
+            self.play_turn()
+        return self.winner
+
+
+def create_ai_game(num_players: int = 2, depth: int = 3, seed: Optional[int] = None,
+                   search: str = 'alphabeta') -> RiskGame:
+    """Set up a quiet RiskGame with only AI players and deal the territories"""
+    if num_players < 2 or num_players > len(PLAYER_COLORS):
+        raise ValueError("Invalid number of players")
+    game = RiskGame(seed)
+    game.verbose = False
+    game.initialize_game()
+    for i in range(num_players):
+        game.players.append(AIPlayer(f"AI Player {i+1}", PLAYER_COLORS[i], depth, search))
+    game.start_game()
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless AI-vs-AI games")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--search", choices=SEARCH_TYPES, default='alphabeta')
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=0, help="processes per root search (0 = serial)")
+    parser.add_argument("--stats", action="store_true", help="print each player's search counters per game")
+    parser.add_argument("--record", metavar="DIR", help="write an action log of every game to DIR for replay.py")
+    args = parser.parse_args()
+
+    wins = {}
+    start = time.perf_counter()
+    for i in range(args.games):
+        seed = None if args.seed is None else args.seed + i
+        game = create_ai_game(args.players, args.depth, seed, args.search)
+        for player in game.players:
+            player.parallel_workers = args.workers
+        log = ActionLog.attach(game) if args.record else None
+        headless = HeadlessGame(game, args.max_turns)
+        winner = headless.run()
+        if log is not None:
+            os.makedirs(args.record, exist_ok=True)
+            log.save(os.path.join(args.record, f"game_{i+1}.rlog"))
+        name = winner.name if winner else "Draw"
+        wins[name] = wins.get(name, 0) + 1
+        print(f"Game {i+1}: {name} after {headless.turns_played} turns")
+        if args.stats:
+            for player in game.players:
+                stats = player.search_stats
+                print(f"  {player.name}: {stats.decisions} decisions, {stats.nodes} nodes "
+                      f"({stats.nodes_per_second:.0f}/s), branching {stats.branching_factor:.1f}, "
+                      f"TT hits {stats.tt_hit_rate:.1%}, cutoffs by ply {dict(sorted(stats.cutoffs.items()))}")
+    elapsed = time.perf_counter() - start
+
+    print("\nResults:")
+    for name, count in sorted(wins.items()):
+        print(f"{name}: {count}")
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:.2f} games/sec)")
+    shutdown_search_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Bounded LRU cache of rendered text surfaces.
+
+Font.render rasterizes the string every call, and the GUI draws the same
+territory names, troop counts and HUD strings frame after frame.  The cache
+hands back the surface from the last time a (font, text, colour) was drawn
+and forgets the least recently used ones beyond its size.
+"""
+from collections import OrderedDict
+from typing import Tuple
+
+import pygame
+
+TEXT_CACHE_SIZE = 512  # Surfaces kept; a board needs about 42 names plus troop counts and HUD lines
+
+
+class TextCache:
+    def __init__(self, maxsize: int = TEXT_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int],
+               antialias: bool = True) -> pygame.Surface:
+        """font.render(text, antialias, color), from the cache when it was drawn before; do not draw on the result"""
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._surfaces[key] = font.render(text, antialias, color)
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,247 @@
+"""Round-robin AI tournaments on the headless engine, rated with Elo.
+
+Every pair of entrants plays the same number of two-player games, half of
+them with each entrant moving first, spread over a process pool.  Each game
+gets its own seed, results are appended to a JSON Lines file as they come
+in, and the ratings are a Bradley-Terry fit on the Elo scale with bootstrap
+confidence intervals.
+
+    python tournament.py --entrant ab2:depth=2 --entrant mcts:search=mcts,time_budget=0.05
+"""
+import argparse
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from project import AIPlayer, SEARCH_TYPES
+from simulation import HeadlessGame, create_ai_game
+
+ELO_BASE = 1500.0
+BOOTSTRAP_SAMPLES = 200
+CONFIDENCE = 0.95
+
+# Entrant keys besides the heuristic_weights names, with their types
+ENTRANT_SETTINGS = {
+    'search': str,
+    'depth': int,
+    'time_budget': float,
+    'node_budget': int,
+    'exact_battle_odds': lambda value: value.lower() in ('1', 'true', 'yes'),
+}
+
+
+def parse_entrant(text: str) -> dict:
+    """Parse NAME[:key=value,...] into an entrant config"""
+    name, _, options = text.partition(':')
+    if not name:
+        raise ValueError(f"Entrant without a name: {text!r}")
+    config = {'name': name, 'search': 'alphabeta', 'depth': 3, 'weights': {}}
+    weight_names = AIPlayer('', (0, 0, 0)).heuristic_weights
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key in ENTRANT_SETTINGS:
+            config[key] = ENTRANT_SETTINGS[key](value)
+        elif key in weight_names:
+            config['weights'][key] = float(value)
+        else:
+            raise ValueError(f"Unknown entrant setting {key!r} in {text!r}")
+    if config['search'] not in SEARCH_TYPES:
+        raise ValueError(f"Unknown search type: {config['search']}")
+    return config
+
+
+def configure_player(player: AIPlayer, config: dict):
+    player.name = config['name']
+    player.max_depth = config['depth']
+    player.search = config['search']
+    player.time_budget = config.get('time_budget')
+    player.node_budget = config.get('node_budget')
+    player.exact_battle_odds = config.get('exact_battle_odds', player.exact_battle_odds)
+    player.heuristic_weights.update(config['weights'])
+
+
+def schedule(entrants: List[dict], games_per_pair: int, seed: int) -> List[dict]:
+    """Round-robin game list; each pair swaps seats every other game"""
+    tasks = []
+    for first, second in combinations(range(len(entrants)), 2):
+        for k in range(games_per_pair):
+            seats = (first, second) if k % 2 == 0 else (second, first)
+            tasks.append({
+                'game': len(tasks),
+                'seed': seed + len(tasks),
+                'seats': [entrants[i] for i in seats],
+            })
+    return tasks
+
+
+def play_game(task: dict, max_turns: int) -> dict:
+    """Play one scheduled game; runs in a pool worker"""
+    start = time.perf_counter()
+    game = create_ai_game(len(task['seats']), seed=task['seed'])
+    for player, config in zip(game.players, task['seats']):
+        configure_player(player, config)
+    headless = HeadlessGame(game, max_turns)
+    winner = headless.run()
+    return {
+        'game': task['game'],
+        'seed': task['seed'],
+        'players': [config['name'] for config in task['seats']],
+        'winner': winner.name if winner else None,
+        'turns': headless.turns_played,
+        'territories': [len(player.territories) for player in game.players],
+        'search_stats': [player.search_stats.as_dict() for player in game.players],
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def run_tournament(entrants: List[dict], games_per_pair: int, output: str, workers: Optional[int] = None,
+                   seed: int = 0, max_turns: int = 1000) -> List[dict]:
+    """Play the round robin, appending each result to `output` as it finishes"""
+    tasks = schedule(entrants, games_per_pair, seed)
+    results = []
+    start = time.perf_counter()
+    with open(output, 'a') as out, ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, task, max_turns) for task in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+            results.append(result)
+            elapsed = time.perf_counter() - start
+            print(f"[{len(results)}/{len(tasks)}] {' vs '.join(result['players'])}: "
+                  f"{result['winner'] or 'Draw'} after {result['turns']} turns "
+                  f"({len(results) / elapsed:.2f} games/sec)")
+    results.sort(key=lambda r: r['game'])
+    return results
+
+
+def load_results(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _scores(results: List[dict]) -> Dict[Tuple[str, str], float]:
+    """score[(a, b)]: points a took from b, a draw is half a point each"""
+    scores = {}
+    for result in results:
+        a, b = result['players']
+        if result['winner'] == a:
+            points = 1.0
+        elif result['winner'] == b:
+            points = 0.0
+        else:
+            points = 0.5
+        scores[(a, b)] = scores.get((a, b), 0.0) + points
+        scores[(b, a)] = scores.get((b, a), 0.0) + 1.0 - points
+    return scores
+
+
+def fit_elo(results: List[dict], names: List[str], iterations: int = 200) -> Dict[str, float]:
+    """
+    Bradley-Terry strengths by minorization-maximization, on the Elo scale
+    with a mean of ELO_BASE. Every pair also gets one virtual draw so an
+    entrant without a win still has a finite rating.
+    """
+    scores = _scores(results)
+    games = {}
+    for result in results:
+        a, b = result['players']
+        games[(a, b)] = games.get((a, b), 0.0) + 1
+        games[(b, a)] = games.get((b, a), 0.0) + 1
+    for a, b in combinations(names, 2):
+        scores[(a, b)] = scores.get((a, b), 0.0) + 0.5
+        scores[(b, a)] = scores.get((b, a), 0.0) + 0.5
+        games[(a, b)] = games.get((a, b), 0.0) + 1
+        games[(b, a)] = games.get((b, a), 0.0) + 1
+
+    strength = {name: 1.0 for name in names}
+    for _ in range(iterations):
+        updated = {}
+        for a in names:
+            wins = sum(scores.get((a, b), 0.0) for b in names if b != a)
+            denominator = sum(games.get((a, b), 0.0) / (strength[a] + strength[b]) for b in names if b != a)
+            updated[a] = wins / denominator if denominator else strength[a]
+        # Fix the geometric mean at 1 so the scale does not drift
+        mean_log = sum(math.log(s) for s in updated.values()) / len(updated)
+        strength = {name: s / math.exp(mean_log) for name, s in updated.items()}
+
+    return {name: ELO_BASE + 400 * math.log10(s) for name, s in strength.items()}
+
+
+def elo_intervals(results: List[dict], names: List[str], samples: int = BOOTSTRAP_SAMPLES,
+                  confidence: float = CONFIDENCE, seed: int = 0) -> Dict[str, Tuple[float, float]]:
+    """Percentile bootstrap interval of every rating, resampling whole games"""
+    rng = random.Random(seed)
+    fits = {name: [] for name in names}
+    for _ in range(samples):
+        resample = [rng.choice(results) for _ in results]
+        for name, rating in fit_elo(resample, names).items():
+            fits[name].append(rating)
+    tail = (1 - confidence) / 2
+    intervals = {}
+    for name, ratings in fits.items():
+        ratings.sort()
+        low = ratings[int(tail * (len(ratings) - 1))]
+        high = ratings[int(math.ceil((1 - tail) * (len(ratings) - 1)))]
+        intervals[name] = (low, high)
+    return intervals
+
+
+def print_ratings(results: List[dict]):
+    # Completion order varies between runs; game order keeps the bootstrap reproducible
+    results = sorted(results, key=lambda r: r['game'])
+    names = sorted({name for result in results for name in result['players']})
+    ratings = fit_elo(results, names)
+    intervals = elo_intervals(results, names)
+    scores = _scores(results)
+    print(f"\n{'Entrant':<20} {'Elo':>7} {int(CONFIDENCE * 100)}% CI{'':>9} {'Games':>6} {'Score':>7}")
+    for name in sorted(names, key=ratings.get, reverse=True):
+        played = sum(1 for result in results if name in result['players'])
+        points = sum(points for (a, _), points in scores.items() if a == name)
+        low, high = intervals[name]
+        share = points / played if played else 0.0
+        print(f"{name:<20} {ratings[name]:>7.0f} [{low:>6.0f}, {high:>6.0f}] {played:>6} {share:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin AI tournament with Elo ratings")
+    parser.add_argument("--entrant", action="append", default=[],
+                        help="NAME[:key=value,...] with keys search, depth, time_budget, node_budget, "
+                             "exact_battle_odds or a heuristic weight")
+    parser.add_argument("--games-per-pair", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--output", default="tournament_results.jsonl")
+    parser.add_argument("--ratings-only", action="store_true",
+                        help="rate the games already in --output instead of playing")
+    args = parser.parse_args()
+
+    if args.ratings_only:
+        results = load_results(args.output)
+    else:
+        try:
+            entrants = [parse_entrant(text) for text in args.entrant]
+        except ValueError as e:
+            parser.error(str(e))
+        if len(entrants) < 2:
+            parser.error("A tournament needs at least two entrants")
+        if len({entrant['name'] for entrant in entrants}) != len(entrants):
+            parser.error("Entrant names must be unique")
+
+        start = time.perf_counter()
+        results = run_tournament(entrants, args.games_per_pair, args.output, args.workers,
+                                 args.seed, args.max_turns)
+        elapsed = time.perf_counter() - start
+        print(f"\n{len(results)} games in {elapsed:.2f}s ({len(results) / elapsed:.2f} games/sec)")
+
+    if results:
+        print_ratings(results)
+
+
+if __name__ == "__main__":
+    main()